@@ -6,16 +6,20 @@ from modules.login import LoginDialog
 from modules.database.db import (
     init_db, get_db_path, save_tlx_result_to_db,
     save_usability_feedback, save_task,
-    fetch_tasks_summary, fetch_tasks_by_user,
     save_manager_interruption
 )
 from modules.systemalerts import get_battery_status
 from modules.idle_tracker import get_idle_time
 from modules.camera_feed import CameraWidget
+from modules.detection.registry import release_all as release_detectors
+from modules.database.write_queue import flush_writes, get_write_queue, shutdown_writes
+from modules.database.rollup import RAW_DAYS, RollupJob
+from modules.database.sync import SyncWorker, sync_enabled
 from modules.nasa_tlx import TLXForm
 from modules.tlx_stats import TLXStatsWidget
 from modules.app_tracker import AppTracker
 from modules.app_usage_summary import AppUsageSummary
+from modules.task_summary import TaskSummaryViewer
 from modules.frustration_skill import FrustrationDistractionDialog
 from modules.system_usability_skill import SystemUsabilityDialog
 
@@ -88,44 +92,6 @@ class IdleTimerWidget(QtWidgets.QWidget):
         self.move(screen_geometry.width() - 320, 50)
         self.show()
 
-# --- TaskSummaryViewer ---
-class TaskSummaryViewer(QtWidgets.QDialog):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Task Summary")
-        self.setMinimumSize(400, 300)
-
-        layout = QtWidgets.QVBoxLayout(self)
-        self.list_widget = QtWidgets.QListWidget()
-        layout.addWidget(self.list_widget)
-
-        summary = fetch_tasks_summary()
-        for user_id, name, task_count in summary:
-            self.list_widget.addItem(f"{name} — {task_count} tasks")
-
-        self.list_widget.itemClicked.connect(self.show_user_tasks)
-
-    def show_user_tasks(self, item):
-        user_name = item.text().split(' — ')[0]
-        user_id = self.find_user_id(user_name)
-
-        tasks = fetch_tasks_by_user(user_id)
-        if not tasks:
-            QtWidgets.QMessageBox.information(self, "Tasks", f"No tasks found for {user_name}.")
-            return
-
-        task_details = "\n\n".join([
-            f"Title: {t[0]}\nDescription: {t[1]}\nTime: {t[2]}" for t in tasks
-        ])
-        QtWidgets.QMessageBox.information(self, f"Tasks of {user_name}", task_details)
-
-    def find_user_id(self, user_name):
-        all_summary = fetch_tasks_summary()
-        for user_id, name, _ in all_summary:
-            if name == user_name:
-                return user_id
-        return None
-
 # --- MyWidget (Main Window) ---
 class MyWidget(QtWidgets.QWidget):
     def __init__(self, user):
@@ -197,8 +163,11 @@ class MyWidget(QtWidgets.QWidget):
         self.app_tracker = AppTracker(self.user_id)
         self.app_tracking_timer = QtCore.QTimer(self)
         self.app_tracking_timer.timeout.connect(self.app_tracker.update)
-        self.app_tracker.app_switched.connect(self.app_usage_summary.refresh_summary)
-        self.app_tracking_timer.start(2000)
+        self.app_tracker.usage_recorded.connect(self.app_usage_summary.record_usage)
+        if self.app_tracker.event_driven:
+            self.app_tracker.start()
+        else:
+            self.app_tracking_timer.start(2000)
 
     def camera_group_box(self):
         group = QtWidgets.QGroupBox("Camera Feed")
@@ -225,6 +194,7 @@ class MyWidget(QtWidgets.QWidget):
                 dialog.exec()
 
             save_tlx_result_to_db(result, self.user_id)
+            flush_writes(timeout=2.0)  # the stats below read the row back
             self.tlx_stats.refresh_stats()
 
             usability_dialog = SystemUsabilityDialog()
@@ -252,6 +222,14 @@ class MyWidget(QtWidgets.QWidget):
         dialog = TaskSummaryViewer()
         dialog.exec()
 
+    def closeEvent(self, event):
+        # The detector model stays cached in the process; only the capture stops
+        self.camera_widget.camera_thread.stop()
+        self.app_tracking_timer.stop()
+        self.app_tracker.stop()
+        flush_writes(timeout=10.0)
+        event.accept()
+
     def logout(self):
         self.close()
         login = LoginDialog()
@@ -267,7 +245,18 @@ class MyWidget(QtWidgets.QWidget):
 if __name__ == "__main__":
     try:
         init_db()
+        get_write_queue()  # replays anything journalled before a crash
+        rollup_job = RollupJob(raw_days=RAW_DAYS)
+        rollup_job.start()
         app = QtWidgets.QApplication([])
+        app.aboutToQuit.connect(release_detectors)
+        app.aboutToQuit.connect(rollup_job.stop)
+        if sync_enabled():
+            sync_worker = SyncWorker()
+            sync_worker.start()
+            get_write_queue().add_listener(lambda kinds: sync_worker.wake())
+            app.aboutToQuit.connect(sync_worker.stop)
+        app.aboutToQuit.connect(shutdown_writes)
         style_path = os.path.join(os.path.dirname(__file__), "assets", "css", "style.qss")
         if os.path.exists(style_path):
             with open(style_path, "r") as f:
@@ -1,60 +1,71 @@
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Qt, Signal
 import time
-import os
 from datetime import datetime
-import sqlite3
-from modules.database.db import get_db_path
+from modules.database.db import save_app_usage, to_epoch_ms
+from modules.window_sources import create_window_source
 
 class AppTracker(QObject):
-    app_switched = Signal()  # this is to signal to 
+    usage_recorded = Signal(str, int)  # (app name, seconds) for every finished usage interval
+    title_changed = Signal(str, str, float)  # (title, process, epoch seconds) from the window source's thread
 
-    def __init__(self, user_id):
+    def __init__(self, user_id, source=None):
         super().__init__()
         self.user_id = user_id
-        self.current_app = None
+        self.current_app = None  # (title, process) of the window in front
         self.start_time = datetime.now()
+        self.source = source or create_window_source()
+        # Queued, so switches reported by the source's thread are handled on ours
+        self.title_changed.connect(self.on_title, Qt.QueuedConnection)
+
+    @property
+    def event_driven(self):
+        return self.source.event_driven
+
+    def start(self):
+        """ Follow the source's change events; polling sources need update() on a timer instead """
+        self.source.start(self.title_changed.emit)
+
+    def stop(self):
+        """ Stop listening and log the interval that is still open """
+        self.source.stop()
+        if self.current_app is not None:
+            now = datetime.now()
+            self.save_to_db(*self.current_app, self.start_time, now, int((now - self.start_time).total_seconds()))
+            self.current_app = None
 
     def get_active_window_title(self):
-        try:
-            import win32gui
-            return win32gui.GetWindowText(win32gui.GetForegroundWindow())
-        except:
-            return "Unknown"
+        return self.source.current_title()
 
     def update(self):
-        active_app = self.get_active_window_title()
+        self.on_title(*self.source.current_window(), time.time())
 
+    def on_title(self, title, process, when):
+        active_app = (title, process)
         if active_app != self.current_app:
-            now = datetime.now()
+            # The source's own timestamp, not the time this slot got to run
+            now = datetime.fromtimestamp(when)
 
             if self.current_app is not None:
                 duration = int((now - self.start_time).total_seconds())
-                self.save_to_db(self.current_app, self.start_time, now, duration)
+                self.save_to_db(*self.current_app, self.start_time, now, duration)
 
             self.current_app = active_app
             self.start_time = now
 
-            self.app_switched.emit()
-
-    def save_to_db(self, app_name, start_time, end_time, duration):
+    def save_to_db(self, title, process, start_time, end_time, duration):
         try:
-            db_path = get_db_path()
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                INSERT INTO app_usage (user_id, app, start_time, end_time, duration)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
+            save_app_usage(
                 self.user_id,
-                app_name,
+                title,
                 start_time.strftime("%H:%M:%S"),
                 end_time.strftime("%H:%M:%S"),
-                duration
-            ))
-
-            conn.commit()
-            conn.close()
-            print(f"✅ App Usage Logged: {app_name}, Duration: {duration}s")
+                duration,
+                start_ms=to_epoch_ms(start_time),
+                end_ms=to_epoch_ms(end_time),
+                process=process
+            )
+            print(f"✅ App Usage Logged: {process} ({title}), Duration: {duration}s")
         except Exception as e:
             print(f"❌ Failed to save app usage to DB: {e}")
+            return
+        self.usage_recorded.emit(process, duration)
@@ -1,55 +1,94 @@
 from PySide6 import QtWidgets
-import sqlite3
 from collections import defaultdict
-from modules.database.db import get_db_path
+from datetime import date, timedelta
+from modules.database.connection import read_snapshot
+from modules.database.db import fetch_app_usage_by_day, fetch_app_usage_totals
+
+WINDOWS = {
+    "Today": 1,
+    "Last 7 days": 7,
+    "All time": None,
+}
 
 class AppUsageSummary(QtWidgets.QWidget):
+    """ Per-app usage totals, seeded from the database once and then kept up to date in memory """
+
     def __init__(self, user_id, parent=None):
         super().__init__(parent)
         self.user_id = user_id
         self.setMinimumHeight(200)
         self.setStyleSheet("font-size: 14px; padding: 10px;")
 
+        # In-memory aggregate: all-time seconds per app, and seconds per app for
+        # each of the last seven local days
+        self.totals = defaultdict(int)
+        self.daily = defaultdict(lambda: defaultdict(int))
+
         self.layout = QtWidgets.QVBoxLayout(self)
+        self.window_selector = QtWidgets.QComboBox()
+        self.window_selector.addItems(list(WINDOWS))
+        self.window_selector.setCurrentText("All time")
+        self.window_selector.currentTextChanged.connect(self.render)
+        self.layout.addWidget(self.window_selector)
+
         self.label = QtWidgets.QLabel("📋 App usage summary will appear here.")
         self.layout.addWidget(self.label)
 
         self.refresh_summary()
 
     def refresh_summary(self):
-        usage_data = defaultdict(int)
-
+        """ Reseed the aggregate from the database (daily rollups, not the raw history) """
+        week_start = (date.today() - timedelta(days=6)).isoformat()
         try:
-            db_path = get_db_path()
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT app, SUM(duration)
-                FROM app_usage
-                WHERE user_id = ?
-                GROUP BY app
-                ORDER BY SUM(duration) DESC
-            ''', (self.user_id,))
-            rows = cursor.fetchall()
-
-            for app, total_duration in rows:
-                usage_data[app] += total_duration
-
-            conn.close()
-
+            with read_snapshot():
+                totals = fetch_app_usage_totals(self.user_id)
+                days = fetch_app_usage_by_day(self.user_id, week_start)
         except Exception as e:
             print(f"❌ Failed to load app usage summary: {e}")
             self.label.setText("❌ Failed to load app usage summary.")
             return
 
+        self.totals.clear()
+        self.daily.clear()
+        for app, seconds in totals:
+            self.totals[app] += seconds
+        for day, app, seconds in days:
+            self.daily[day][app] += seconds
+
+        self.render()
+
+    def record_usage(self, app_name, duration):
+        """ Fold one usage interval in without touching the database """
+        self.totals[app_name] += duration
+        self.daily[date.today().isoformat()][app_name] += duration
+        self.render()
+
+    def window_totals(self, days):
+        if days is None:
+            return self.totals
+
+        first_day = (date.today() - timedelta(days=days - 1)).isoformat()
+        oldest_kept = (date.today() - timedelta(days=6)).isoformat()
+        for day in [day for day in self.daily if day < oldest_kept]:
+            del self.daily[day]  # past the longest window
+
+        usage = defaultdict(int)
+        for day, apps in self.daily.items():
+            if day >= first_day:
+                for app, seconds in apps.items():
+                    usage[app] += seconds
+        return usage
+
+    def render(self, *args):
+        usage_data = self.window_totals(WINDOWS[self.window_selector.currentText()])
+
         if not usage_data:
             self.label.setText("📋 No usage recorded.")
             return
 
         summary_lines = [
             f"{app} — {round(seconds / 60, 1)} min"
-            for app, seconds in usage_data.items()
+            for app, seconds in sorted(usage_data.items(), key=lambda item: item[1], reverse=True)
         ]
 
         self.label.setText("📋 App Usage Summary:\n" + "\n".join(summary_lines))
@@ -1,100 +1,244 @@
 from PySide6 import QtWidgets, QtCore
 from PySide6.QtGui import QImage, QPixmap
 import cv2
+import numpy as np
+import threading
 import time
+from modules.detection.config import load_config
+from modules.detection.frame_buffer import LatestFrameBuffer
+from modules.detection.pipeline import DetectionPipeline
+from modules.detection.registry import acquire_detector, release_detector
+from modules.detection.sources import FramePacer, open_source
+from modules.detection.worker_process import DetectionProcess
+
+class DisplayBufferPool:
+    """ A few reusable display-sized buffers so scaling a frame does not allocate """
+
+    def __init__(self, count=3):
+        self.count = count
+        self.buffers = []
+        self.index = 0
+
+    def next(self, width, height):
+        if not self.buffers or self.buffers[0].shape[:2] != (height, width):
+            self.buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(self.count)]
+        buffer = self.buffers[self.index]
+        self.index = (self.index + 1) % self.count
+        return buffer
 
 class CameraThread(QtCore.QThread):
     frame_update = QtCore.Signal(object)
     alert_signal = QtCore.Signal(str)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, config=None):
         super().__init__(parent)
         self.running = False
-        self.second_person_start_time = None
-
-        # Load YOLO model
-        self.net = cv2.dnn.readNetFromDarknet(
-            "assets/yolo/yolov3.cfg",
-            "assets/yolo/yolov3.weights"
-        )
-        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.config = config or load_config()
+        self.pipeline = None
 
-        with open("assets/yolo/coco.names", "r") as f:
-            self.classes = [line.strip() for line in f.readlines()]
+        self.inference_buffer = LatestFrameBuffer()
+        self.display_lock = threading.Lock()
+        self.display_pending = False
+        self.display_dropped = 0
 
-        self.output_layers = self.net.getUnconnectedOutLayersNames()
+        # Set by CameraWidget: where the preview goes and whether anyone can see it
+        self.display_enabled = self.config["preview"]
+        self.display_size = (640, 480)
+        self.display_pool = DisplayBufferPool()
 
     def run(self):
         self.running = True
-        cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)  # ✅ Use DirectShow instead of MSMF
 
-        if not cap.isOpened():
+        # Cached per process, so only the first login pays for loading YOLO,
+        # and it happens here instead of on the GUI thread
+        try:
+            if self.config["detection_process"]:
+                # Inference in its own process, fed through shared-memory frame slots
+                detector = DetectionProcess(self.config)
+            else:
+                # Ours alone while this thread runs, so a camera thread still
+                # stopping after a logout never holds up this one's inference
+                detector = acquire_detector(self.config)
+        except Exception as e:
+            print(f"❌ Error: Unable to load detector: {e}")
+            return
+        print(f"Detector: {detector.describe()}")
+        self.pipeline = DetectionPipeline(self.config, detector)
+
+        try:
+            self.capture_loop()
+        finally:
+            # Also when the source never opened: the worker process and its
+            # shared memory must not outlive the thread
+            if isinstance(detector, DetectionProcess):
+                detector.close()
+            else:
+                release_detector(self.config, detector)
+
+    def capture_loop(self):
+        # "camera:0" by default; a video, image folder or synthetic source also works
+        source = open_source(self.config["source"])
+        if not source.is_opened():
             print("❌ Error: Unable to open camera.")
             return
+        pacer = FramePacer(source.fps)
+
+        # Capture runs here at camera speed, inference on its own thread and
+        # display on the GUI thread; each stage only ever sees the newest frame
+        inference_thread = threading.Thread(target=self.inference_loop, daemon=True)
+        inference_thread.start()
 
         while self.running:
-            ret, frame = cap.read()
+            if not source.live:
+                pacer.wait()
+            try:
+                ret, frame, slot = self.read_frame(source)  # a live camera blocks until the next frame
+            except RuntimeError as e:
+                print(f"❌ Error: {e}")
+                break
             if ret:
-                person_count = self.detect_people(frame)
-                self.frame_update.emit(frame)
+                captured_at = time.time()
+                self.pipeline.observe_capture(captured_at)
+                replaced = self.inference_buffer.put((frame, captured_at, slot))
+                if replaced is not None:
+                    self.release_slot(replaced[2])
+                self.publish_frame(frame)
+            elif not source.live:
+                break
 
-                current_time = time.time()
+        self.running = False
+        self.inference_buffer.close()
+        inference_thread.join()
+        source.release()
 
-                if person_count >= 2:
-                    if self.second_person_start_time is None:
-                        self.second_person_start_time = current_time
-                    elif current_time - self.second_person_start_time >= 10:
-                        self.alert_signal.emit("SECOND_PERSON_PRESENT")
-                        self.second_person_start_time = None
-                else:
-                    self.second_person_start_time = None
+        if self.pipeline.motion_gate:
+            print(self.pipeline.motion_gate.summary())
 
-            time.sleep(0.03)  # ~30 FPS
+    def inference_loop(self):
+        while self.running:
+            item = self.inference_buffer.get(timeout=0.5)
+            if item is None:
+                continue
+            frame, captured_at, slot = item
+
+            try:
+                result = self.pipeline.process(frame, captured_at)
+            finally:
+                self.release_slot(slot)
+            if result.alert:
+                self.alert_signal.emit("SECOND_PERSON_PRESENT")
+
+    def read_frame(self, source):
+        """ (ok, frame, shared-memory slot or None) """
+        detector = self.pipeline.detector
+        if isinstance(detector, DetectionProcess):
+            return detector.capture(source)
+        ret, frame = source.read()
+        return ret, frame, None
+
+    def release_slot(self, slot):
+        if slot is not None:
+            self.pipeline.detector.release_slot(slot)
+
+    def publish_frame(self, frame):
+        # Hidden, minimised or blocked by a dialog: skip the whole display stage
+        if not self.display_enabled:
+            return
 
-        cap.release()
+        # At most one frame is queued towards the GUI; while it is still
+        # pending newer frames are simply not sent
+        with self.display_lock:
+            if self.display_pending:
+                self.display_dropped += 1
+                return
+            self.display_pending = True
+        self.frame_update.emit(self.to_display_image(frame))
+
+    def to_display_image(self, frame):
+        # Scale and wrap here so the GUI thread only has to upload the pixmap
+        frame_height, frame_width = frame.shape[:2]
+        target_width, target_height = self.display_size
+        scale = min(target_width / frame_width, target_height / frame_height)
+        width = max(1, int(frame_width * scale))
+        height = max(1, int(frame_height * scale))
+
+        buffer = self.display_pool.next(width, height)
+        cv2.resize(frame, (width, height), dst=buffer, interpolation=cv2.INTER_AREA)
+        return QImage(buffer.data, width, height, buffer.strides[0], QImage.Format_BGR888)
+
+    def frame_displayed(self):
+        with self.display_lock:
+            self.display_pending = False
 
     def stop(self):
         self.running = False
         self.wait()
 
     def detect_people(self, frame):
-        height, width = frame.shape[:2]
-
-        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (416, 416), swapRB=True, crop=False)
-        self.net.setInput(blob)
-        outputs = self.net.forward(self.output_layers)
-
-        person_count = 0
-
-        for output in outputs:
-            for detection in output:
-                scores = detection[5:]
-                class_id = int(scores.argmax())
-                confidence = scores[class_id]
-
-                if self.classes[class_id] == "person" and confidence > 0.5:
-                    person_count += 1
-
-        return person_count
+        return self.pipeline.detector.detect(frame, roi=self.pipeline.roi)
 
 class CameraWidget(QtWidgets.QLabel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedSize(640, 480)
         self.setStyleSheet("background-color: black;")
+        self.setAlignment(QtCore.Qt.AlignCenter)
 
         self.camera_thread = CameraThread(self)
         self.camera_thread.frame_update.connect(self.update_frame)
         self.camera_thread.alert_signal.connect(self.show_alert)
+
+        # Privacy mode: detection keeps running but no frame is ever drawn
+        self.preview_enabled = self.camera_thread.config["preview"]
+        if not self.preview_enabled:
+            self.setStyleSheet("background-color: black; color: gray;")
+            self.setText("Camera preview disabled")
+
+        self.window_blocked = False
+        self.watched_window = None
+        self.camera_thread.display_size = (self.width(), self.height())
+        self.camera_thread.display_enabled = False
         self.camera_thread.start()
 
-    def update_frame(self, frame):
-        image = QImage(
-            frame.data, frame.shape[1], frame.shape[0], frame.strides[0],
-            QImage.Format_BGR888
-        )
+    def update_frame(self, image):
         self.setPixmap(QPixmap.fromImage(image))
+        self.camera_thread.frame_displayed()
+
+    def update_display_state(self):
+        window = self.window()
+        self.camera_thread.display_enabled = (
+            self.preview_enabled
+            and self.isVisible()
+            and not window.isMinimized()
+            and not self.window_blocked
+        )
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Watch the top-level window for minimise and modal dialogs (TLXForm etc.)
+        if self.watched_window is not self.window():
+            self.watched_window = self.window()
+            self.watched_window.installEventFilter(self)
+        self.update_display_state()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_display_state()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.camera_thread.display_size = (self.width(), self.height())
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.WindowBlocked:
+            self.window_blocked = True
+            self.update_display_state()
+        elif event.type() == QtCore.QEvent.WindowUnblocked:
+            self.window_blocked = False
+            self.update_display_state()
+        elif event.type() in (QtCore.QEvent.WindowStateChange, QtCore.QEvent.Hide, QtCore.QEvent.Show):
+            self.update_display_state()
+        return False
 
     def show_alert(self, message):
         if message == "SECOND_PERSON_PRESENT":
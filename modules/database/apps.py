@@ -0,0 +1,93 @@
+"""
+Interned app identities for app_usage.
+
+Every usage interval belongs to an application, kept once in apps, and has a
+window title, kept once per app in app_titles. app_usage rows and the usage
+aggregates only carry the integer ids. The application is the foreground
+window's process as the window source reports it ("Code.exe", "firefox"), so
+all windows of one program share one id whatever their titles say.
+
+Rows that predate process names (old journal lines and seats, legacy CSV logs,
+the migration 11 backfill) have only the title; their app is guessed from it
+("main.py - Project 6 - Visual Studio Code" -> "Visual Studio Code"), and a
+title that is nothing but that name ("Spotify") has no title row.
+Ids are cached in memory once committed, so a known window costs no lookup.
+"""
+from modules.database import connection
+from modules.database.connection import get_connection, transaction
+
+UNKNOWN_APP = "Unknown"
+
+# Windows and most X11 programs put their own name last: "<document> - <app>"
+TITLE_SEPARATORS = (" - ", " — ", " – ", " | ")
+
+_cache = {}  # (db path, title, process) -> (app_id, title_id)
+
+
+def clean_title(title):
+    return (title or "").strip() or UNKNOWN_APP
+
+
+def app_for_title(title):
+    """ The application a window title probably belongs to, for rows without a process """
+    title = clean_title(title)
+    cut = max(title.rfind(sep) + len(sep) if sep in title else 0 for sep in TITLE_SEPARATORS)
+    return title[cut:].strip() or title
+
+
+def lookup_window(conn, title, process):
+    """ (app_id, title_id) for a cleaned title and its process (None: legacy row), adding the rows that are missing """
+    name = (process.strip() or UNKNOWN_APP) if process is not None else app_for_title(title)
+    conn.execute("INSERT OR IGNORE INTO apps (name) VALUES (?)", (name,))
+    app_id = conn.execute("SELECT id FROM apps WHERE name = ?", (name,)).fetchone()[0]
+    if title == name:
+        return app_id, None
+    conn.execute("INSERT OR IGNORE INTO app_titles (app_id, title) VALUES (?, ?)", (app_id, title))
+    title_id = conn.execute(
+        "SELECT id FROM app_titles WHERE app_id = ? AND title = ?", (app_id, title)
+    ).fetchone()[0]
+    return app_id, title_id
+
+
+def intern_windows(windows, db_path=None):
+    """ {(title, process): (app_id, title_id)} for raw window titles and their processes """
+    path = db_path or connection.DB_PATH
+    ids = {}
+    missing = set()
+    for window in set(windows):
+        title, process = window
+        cached = _cache.get((path, clean_title(title), process))
+        if cached is None:
+            missing.add(window)
+        else:
+            ids[window] = cached
+    if not missing:
+        return ids
+
+    conn = get_connection(db_path)
+    if conn.in_transaction:
+        # Part of the caller's transaction, which may still roll back: don't cache
+        for title, process in missing:
+            ids[(title, process)] = lookup_window(conn, clean_title(title), process)
+        return ids
+
+    with transaction(db_path) as conn:
+        found = {(title, process): lookup_window(conn, clean_title(title), process) for title, process in missing}
+    for (title, process), found_ids in found.items():
+        _cache[(path, clean_title(title), process)] = found_ids
+    ids.update(found)
+    return ids
+
+
+def intern_titles(titles, db_path=None):
+    """ {title: (app_id, title_id)} for legacy window titles that come without a process """
+    ids = intern_windows([(title, None) for title in titles], db_path)
+    return {title: found for (title, _), found in ids.items()}
+
+
+def bind_app_ids(rows, db_path=None):
+    """ Fill in app_id and title_id for app_usage parameter dicts from their "app" title and "process" """
+    ids = intern_windows([(row.get("app"), row.get("process")) for row in rows], db_path)
+    for row in rows:
+        row["app_id"], row["title_id"] = ids[(row.get("app"), row.get("process"))]
+    return rows
@@ -0,0 +1,278 @@
+"""
+Bulk import of the legacy CSV logs and streaming export of database tables.
+
+    python -m modules.database.bulk import --user-id 2 app_usage_log.csv tlx_results.csv
+    python -m modules.database.bulk import --user-id 2 --date 2025-04-27 app_usage_log.csv
+    python -m modules.database.bulk export app_usage --since "2025-04-01" --out usage.jsonl
+
+Imports stream the file and insert it with executemany, one transaction per
+chunk; the aggregate triggers keep the summaries in step. Importing the same
+file twice inserts its rows twice. Exports stream the query result, so memory
+use does not grow with the table. The legacy logs carry no user, so --user-id
+is required on import.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone
+from modules.database.apps import intern_titles
+from modules.database.connection import get_connection, transaction
+
+CHUNK_SIZE = 5000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# File name -> kind, as written by app_tracker (older versions), tlx_logger,
+# background_noise and phone_call
+LEGACY_FILES = {
+    "app_usage_log.csv": "app_usage",
+    "tlx_results.csv": "tlx",
+    "task_log.csv": "background_noise",
+    "phone_task_log.csv": "phone_call",
+}
+
+INSERTS = {
+    "app_usage": """
+        INSERT INTO app_usage (user_id, app_id, title_id, start_time, end_time, duration, timestamp, start_ms, end_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "tlx": """
+        INSERT INTO tlx_entries (user_id, mental, physical, temporal, performance, effort, frustration, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """,
+    "distraction": """
+        INSERT INTO distraction_events (user_id, source, event, timestamp, elapsed)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+}
+
+TLX_COLUMNS = ["Mental", "Physical", "Temporal", "Performance", "Effort", "Frustration"]
+
+
+def to_utc_text(moment):
+    """ Local naive datetime -> the UTC text format of the timestamp columns """
+    return moment.astimezone(timezone.utc).strftime(TIME_FORMAT)
+
+
+def optional_int(value):
+    # tlx_results.csv has rows with empty answers; they become NULL
+    value = (value or "").strip()
+    return int(float(value)) if value else None
+
+
+def file_date(path):
+    return datetime.fromtimestamp(os.path.getmtime(path)).date()
+
+
+# -- readers: each yields (statement kind, parameter tuple) ----------------
+
+def read_app_usage(path, user_id, first_day):
+    """ Rows are App, Start Time, End Time, Duration (s) with wall-clock times only """
+    day = first_day
+    previous_start = None
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) < 4:
+                continue
+            app, start_text, end_text, duration = row[0], row[1], row[2], row[3]
+            try:
+                start_clock = datetime.strptime(start_text, "%H:%M:%S").time()
+                end_clock = datetime.strptime(end_text, "%H:%M:%S").time()
+            except ValueError:
+                continue
+            # The log is chronological, so a start earlier than the previous one means midnight passed
+            if previous_start is not None and start_clock < previous_start:
+                day += timedelta(days=1)
+            previous_start = start_clock
+
+            start = datetime.combine(day, start_clock)
+            end = datetime.combine(day, end_clock)
+            if end < start:
+                end += timedelta(days=1)
+            yield "app_usage", (
+                user_id, app, start_text, end_text, optional_int(duration), to_utc_text(end),
+                int(start.timestamp() * 1000), int(end.timestamp() * 1000),
+            )
+
+
+def read_tlx(path, user_id, first_day):
+    # The CSV has no time of entry; file modification time is the best there is
+    stamp = to_utc_text(datetime.fromtimestamp(os.path.getmtime(path)))
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            values = [optional_int(row.get(column)) for column in TLX_COLUMNS]
+            if all(value is None for value in values):
+                continue
+            yield "tlx", (user_id, *values, stamp)
+
+
+def make_distraction_reader(source):
+    def read_distraction(path, user_id, first_day):
+        """ Rows are Event, Timestamp (local), Elapsed seconds; the header is optional """
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if len(row) < 3:
+                    continue
+                try:
+                    moment = datetime.strptime(row[1], TIME_FORMAT)
+                    elapsed = float(row[2]) if row[2] else None
+                except ValueError:
+                    continue  # header
+                yield "distraction", (user_id, source, row[0], to_utc_text(moment), elapsed)
+    return read_distraction
+
+
+READERS = {
+    "app_usage": read_app_usage,
+    "tlx": read_tlx,
+    "background_noise": make_distraction_reader("background_noise"),
+    "phone_call": make_distraction_reader("phone_call"),
+}
+
+
+def report(action, rows, started):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    # stderr, so an export to stdout stays clean
+    print(f"✅ {action} {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+
+def import_file(path, user_id, kind=None, first_day=None, db_path=None, chunk_size=CHUNK_SIZE):
+    kind = kind or LEGACY_FILES.get(os.path.basename(path))
+    if kind not in READERS:
+        raise ValueError(f"Cannot tell what {path} contains; pass --kind ({', '.join(READERS)})")
+
+    started = time.perf_counter()
+    total = 0
+    chunk = []
+    statement = None
+
+    def write(chunk):
+        if statement == "app_usage":
+            # Readers yield the window title second; the table wants its ids
+            ids = intern_titles([params[1] for params in chunk], db_path)
+            chunk = [(params[0], *ids[params[1]], *params[2:]) for params in chunk]
+        with transaction(db_path) as conn:
+            conn.executemany(INSERTS[statement], chunk)
+
+    for statement, params in READERS[kind](path, user_id, first_day or file_date(path)):
+        chunk.append(params)
+        if len(chunk) >= chunk_size:
+            write(chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        write(chunk)
+        total += len(chunk)
+
+    report(f"Imported {os.path.basename(path)}:", total, started)
+    return total
+
+
+# -- export ----------------------------------------------------------------
+
+# Column that time ranges filter on, for tables that do not use "timestamp"
+TIME_COLUMNS = {
+    "app_usage_daily": "day",
+    "tlx_daily": "day",
+    "app_usage_hourly": "hour",
+}
+
+
+def table_columns(conn, table):
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if table not in names:
+        raise ValueError(f"No table named {table!r}")
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def export_table(table, out, fmt="csv", since=None, until=None, user_id=None, db_path=None):
+    conn = get_connection(db_path)
+    columns = table_columns(conn, table)
+
+    conditions = []
+    params = []
+    time_column = TIME_COLUMNS.get(table, "timestamp")
+    if since or until:
+        if time_column not in columns:
+            raise ValueError(f"{table} has no time column to filter on")
+        if since:
+            conditions.append(f"{time_column} >= ?")
+            params.append(since)
+        if until:
+            conditions.append(f"{time_column} < ?")
+            params.append(until)
+    if user_id is not None:
+        if "user_id" not in columns:
+            raise ValueError(f"{table} has no user_id column")
+        conditions.append("user_id = ?")
+        params.append(user_id)
+
+    sql = f"SELECT * FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+
+    started = time.perf_counter()
+    total = 0
+    cursor = conn.execute(sql, params)
+    names = [description[0] for description in cursor.description]
+
+    output = open(out, "w", newline="", encoding="utf-8") if out != "-" else nullcontext(sys.stdout)
+    with output as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(names)
+        while True:
+            rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            if fmt == "csv":
+                writer.writerows(rows)
+            else:
+                f.writelines(json.dumps(dict(zip(names, row))) + "\n" for row in rows)
+            total += len(rows)
+
+    report(f"Exported {table}:", total, started)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database file (default: the app database)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="load legacy CSV logs")
+    importer.add_argument("files", nargs="+")
+    importer.add_argument("--user-id", type=int, required=True)
+    importer.add_argument("--kind", choices=sorted(READERS), help="file contents (default: from the file name)")
+    importer.add_argument("--date", type=date.fromisoformat,
+                          help="day the app usage log starts on (default: the file's modification date)")
+    importer.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    exporter = commands.add_parser("export", help="write a table to CSV or JSON lines")
+    exporter.add_argument("table")
+    exporter.add_argument("--out", default="-", help="output file (default: stdout)")
+    exporter.add_argument("--format", choices=["csv", "jsonl"],
+                          help="default: from the --out extension, else csv")
+    exporter.add_argument("--since", help="UTC time or day, inclusive")
+    exporter.add_argument("--until", help="UTC time or day, exclusive")
+    exporter.add_argument("--user-id", type=int)
+    args = parser.parse_args(argv)
+
+    from modules.database.migrations import migrate
+    migrate(get_connection(args.db))
+
+    if args.command == "import":
+        for path in args.files:
+            import_file(path, args.user_id, args.kind, args.date, args.db, args.chunk_size)
+    else:
+        fmt = args.format or ("jsonl" if args.out.endswith((".jsonl", ".json")) else "csv")
+        export_table(args.table, args.out, fmt, args.since, args.until, args.user_id, args.db)
+
+
+if __name__ == "__main__":
+    main()
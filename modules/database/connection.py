@@ -0,0 +1,117 @@
+# Shared SQLite connection layer. Every thread keeps one long-lived connection
+# per database file instead of connect/commit/close around each statement.
+# Because the connection (and its statement cache) lives on, the same SQL text
+# is only prepared once per thread.
+import atexit
+import os
+import sqlite3
+import threading
+import urllib.request
+from contextlib import contextmanager
+
+DB_FOLDER = os.path.dirname(__file__)
+DB_PATH = os.path.join(DB_FOLDER, "tlx_app.db")
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",      # readers and the writer no longer block each other
+    "PRAGMA synchronous = NORMAL",    # fsync on checkpoint, not on every commit (safe with WAL)
+    "PRAGMA cache_size = -16000",     # ~16 MB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Reporting connections: read-only, so a dashboard query can never take the
+# write lock. Under WAL each read transaction sees a snapshot and runs
+# alongside the writer instead of queueing behind it.
+READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+_local = threading.local()
+_lock = threading.Lock()
+_connections = []
+_generation = 0  # bumped by close_connections() so threads reopen afterwards
+
+
+def get_connection(db_path=None):
+    """ This thread's connection to db_path (the app database by default) """
+    return _thread_connection(db_path or DB_PATH, read_only=False)
+
+
+def get_read_connection(db_path=None):
+    """ This thread's read-only connection to db_path, for reporting queries """
+    return _thread_connection(db_path or DB_PATH, read_only=True)
+
+
+def _thread_connection(db_path, read_only):
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.generation != _generation:
+        connections = _local.connections = {}
+        _local.generation = _generation
+
+    conn = connections.get((db_path, read_only))
+    if conn is None:
+        # check_same_thread=False only so close_connections() can run at exit;
+        # each connection is still used by the thread that opened it
+        if read_only:
+            uri = "file:" + urllib.request.pathname2url(os.path.abspath(db_path)) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=5.0, cached_statements=256, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(db_path, timeout=5.0, cached_statements=256, check_same_thread=False)
+        for pragma in READ_PRAGMAS if read_only else PRAGMAS:
+            conn.execute(pragma)
+        connections[(db_path, read_only)] = conn
+        with _lock:
+            _connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction(db_path=None):
+    """ Commit on success, roll back on error """
+    conn = get_connection(db_path)
+    with conn:
+        yield conn
+
+
+@contextmanager
+def read_snapshot(db_path=None):
+    """ Run several reporting queries against one consistent snapshot """
+    conn = get_read_connection(db_path)
+    if conn.in_transaction:
+        yield conn  # already inside a snapshot on this thread
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()  # nothing to commit; just ends the read transaction
+
+
+def close_thread_connections():
+    """ Close the calling thread's connections (for worker threads that are about to exit) """
+    connections = getattr(_local, "connections", None) or {}
+    with _lock:
+        for conn in connections.values():
+            if conn in _connections:
+                _connections.remove(conn)
+            conn.close()
+    connections.clear()
+
+
+def close_connections():
+    global _generation
+    with _lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+        _generation += 1
+
+
+atexit.register(close_connections)
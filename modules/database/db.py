@@ -1,188 +1,234 @@
-import sqlite3
 import os
-
-# Define database path
-DB_FOLDER = os.path.dirname(__file__)
-DB_PATH = os.path.join(DB_FOLDER, "tlx_app.db")
+import time
+from datetime import datetime, timezone
+from modules.database.connection import DB_FOLDER, DB_PATH, get_connection, get_read_connection, transaction
+from modules.database.events import EVENT_STATEMENTS, make_event
+from modules.database.migrations import migrate
+from modules.database.sync import spool_events, sync_enabled
+from modules.database.write_queue import get_write_queue
 
 def get_db_path():
     return DB_PATH
 
 def init_db():
     os.makedirs(DB_FOLDER, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT CHECK(role IN ('employee', 'manager')) NOT NULL
-        )
-    """)
-
-    # TLX Entries table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tlx_entries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            mental INTEGER,
-            physical INTEGER,
-            temporal INTEGER,
-            performance INTEGER,
-            effort INTEGER,
-            frustration INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-
-    # App Usage table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS app_usage (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            app TEXT,
-            start_time TEXT,
-            end_time TEXT,
-            duration INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-
-    # Manager Interruption table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS manager_interruptions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-
-    # Usability Feedback table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS usability_feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            score INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-
-    # Tasks table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            title TEXT,
-            description TEXT,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
-
-def save_manager_interruption(user_id):
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    # The schema itself lives in migrations.py
+    migrate(get_connection())
 
-    cursor.execute('''
-        INSERT INTO manager_interruptions (user_id)
-        VALUES (?)
-    ''', (user_id,))
+# The frequent save_* calls below are write-behind: they return
+# immediately and the row is committed by the background writer.
 
-    conn.commit()
-    conn.close()
+def save_manager_interruption(user_id):
+    get_write_queue().submit("interruption", user_id=user_id)
 
 def fetch_manager_interruptions(user_id):
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
+    cursor = get_read_connection().execute('''
         SELECT timestamp FROM manager_interruptions
         WHERE user_id = ?
+        ORDER BY timestamp
     ''', (user_id,))
 
-    results = cursor.fetchall()
-    conn.close()
-    return [row[0] for row in results]
+    return [row[0] for row in cursor.fetchall()]
 
 def save_tlx_result_to_db(result, user_id):
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        INSERT INTO tlx_entries (user_id, mental, physical, temporal, performance, effort, frustration)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (user_id, result['Mental'], result['Physical'], result['Temporal'], result['Performance'], result['Effort'], result['Frustration']))
-
-    conn.commit()
-    conn.close()
+    get_write_queue().submit(
+        "tlx", user_id=user_id,
+        mental=result['Mental'], physical=result['Physical'], temporal=result['Temporal'],
+        performance=result['Performance'], effort=result['Effort'], frustration=result['Frustration']
+    )
 
 def save_usability_feedback(user_id, score):
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        INSERT INTO usability_feedback (user_id, score)
-        VALUES (?, ?)
-    ''', (user_id, score))
-
-    conn.commit()
-    conn.close()
+    get_write_queue().submit("usability", user_id=user_id, score=score)
 
 def save_task(user_id, title, description):
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        INSERT INTO tasks (user_id, title, description)
-        VALUES (?, ?, ?)
-    ''', (user_id, title, description))
-
-    conn.commit()
-    conn.close()
+    kind, payload = make_event("task", user_id=user_id, title=title, description=description)
+    with transaction() as conn:
+        conn.execute(EVENT_STATEMENTS[kind], payload)
+        if sync_enabled():
+            spool_events(conn, [(kind, payload)])
+    invalidate_task_summaries()
+
+# Pages of the manager's per-user task counts, kept until a task is saved here
+# or for TASK_SUMMARY_TTL seconds, so users and tasks added by other processes
+# (create_test_users, sync, the ingest server) show up without a restart
+TASK_SUMMARY_TTL = 30.0
+_task_summary_cache = {}  # (after_user_id, limit) -> (fetched at, rows)
+
+def invalidate_task_summaries():
+    _task_summary_cache.clear()
+
+def fetch_tasks_summary_page(after_user_id=0, limit=200):
+    """ (user id, name, task count) for the next `limit` users after after_user_id, by id """
+    key = (after_user_id, limit)
+    cached = _task_summary_cache.get(key)
+    if cached is None or time.monotonic() - cached[0] > TASK_SUMMARY_TTL:
+        # Keyset page over users; each count is a range lookup in the tasks index
+        cursor = get_read_connection().execute('''
+            SELECT u.id, u.name, (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.id)
+            FROM users u
+            WHERE u.id > ?
+            ORDER BY u.id
+            LIMIT ?
+        ''', (after_user_id, limit))
+        cached = (time.monotonic(), cursor.fetchall())
+        _task_summary_cache[key] = cached
+    return cached[1]
 
 def fetch_tasks_summary():
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
+    cursor = get_read_connection().execute('''
         SELECT u.id, u.name, COUNT(t.id)
         FROM users u
         LEFT JOIN tasks t ON u.id = t.user_id
         GROUP BY u.id
     ''')
 
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return cursor.fetchall()
 
 def fetch_tasks_by_user(user_id):
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute('''
+    cursor = get_read_connection().execute('''
         SELECT title, description, timestamp
         FROM tasks
         WHERE user_id = ?
+        ORDER BY timestamp
+    ''', (user_id,))
+
+    return cursor.fetchall()
+
+def fetch_tasks_page(user_id, before=None, limit=50):
+    """
+    (id, title, description, timestamp) of a user's tasks, newest first. Pass the
+    (timestamp, id) of the last row of the previous page as `before` for the next one.
+    """
+    if before is None:
+        cursor = get_read_connection().execute('''
+            SELECT id, title, description, timestamp
+            FROM tasks
+            WHERE user_id = ?
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        ''', (user_id, limit))
+    else:
+        cursor = get_read_connection().execute('''
+            SELECT id, title, description, timestamp
+            FROM tasks
+            WHERE user_id = ? AND (timestamp, id) < (?, ?)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        ''', (user_id, before[0], before[1], limit))
+
+    return cursor.fetchall()
+
+def fetch_user_by_email(email):
+    cursor = get_read_connection().execute(
+        "SELECT id, name, password_hash, role FROM users WHERE email = ?", (email,)
+    )
+    return cursor.fetchone()
+
+def save_app_usage(user_id, app_name, start_time, end_time, duration, start_ms=None, end_ms=None, process=None):
+    # start_time/end_time are the legacy wall-clock strings; start_ms/end_ms the real interval.
+    # app_name is the window title; process identifies the app (see apps.py)
+    get_write_queue().submit(
+        "app_usage", user_id=user_id, app=app_name, process=process,
+        start_time=start_time, end_time=end_time, duration=duration,
+        start_ms=start_ms, end_ms=end_ms
+    )
+
+def fetch_app_usage_totals(user_id):
+    # app_usage_daily is maintained by a trigger on app_usage (see migrations.py)
+    cursor = get_read_connection().execute('''
+        SELECT a.name, SUM(d.duration)
+        FROM app_usage_daily d
+        JOIN apps a ON a.id = d.app_id
+        WHERE d.user_id = ?
+        GROUP BY d.app_id
+        ORDER BY SUM(d.duration) DESC
+    ''', (user_id,))
+
+    return cursor.fetchall()
+
+def fetch_app_usage_by_day(user_id, since_day):
+    """ (day, app, seconds) rows for local days from since_day ('YYYY-MM-DD') on """
+    cursor = get_read_connection().execute('''
+        SELECT d.day, a.name, d.duration
+        FROM app_usage_daily d
+        JOIN apps a ON a.id = d.app_id
+        WHERE d.user_id = ? AND d.day >= ?
+    ''', (user_id, since_day))
+
+    return cursor.fetchall()
+
+def to_epoch_ms(moment):
+    """ Epoch milliseconds from a datetime (naive means local time) or a number that already is one """
+    if isinstance(moment, datetime):
+        return int(moment.timestamp() * 1000)
+    return int(moment)
+
+def query_usage(user_id, start, end):
+    """
+    Seconds per app between start and end (datetimes or epoch ms), largest first.
+    Intervals that cross the window edges only count the part inside it. History
+    already compacted into hourly rollups counts by the hour it falls in.
+    """
+    start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+    start_hour = datetime.fromtimestamp(start_ms / 1000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    end_hour = datetime.fromtimestamp(end_ms / 1000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    # Raw intervals come from two index range scans: those starting at most an
+    # hour before the window (the main index), and the few longer ones (the
+    # partial index from migration 8, whose condition must match literally)
+    cursor = get_read_connection().execute('''
+        SELECT a.name, u.seconds
+        FROM (
+            SELECT app_id, SUM(seconds) AS seconds
+            FROM (
+                SELECT app_id, (MIN(end_ms, :end) - MAX(start_ms, :start)) / 1000.0 AS seconds
+                FROM app_usage
+                WHERE user_id = :user AND start_ms >= :start - 3600000 AND start_ms < :end AND end_ms > :start
+                UNION ALL
+                SELECT app_id, (MIN(end_ms, :end) - MAX(start_ms, :start)) / 1000.0
+                FROM app_usage
+                WHERE user_id = :user AND end_ms - start_ms > 3600000
+                  AND start_ms < :start - 3600000 AND end_ms > :start
+                UNION ALL
+                SELECT app_id, duration
+                FROM app_usage_hourly
+                WHERE user_id = :user AND hour >= :start_hour AND hour < :end_hour
+            )
+            GROUP BY app_id
+        ) u
+        JOIN apps a ON a.id = u.app_id
+        ORDER BY u.seconds DESC
+    ''', {"user": user_id, "start": start_ms, "end": end_ms, "start_hour": start_hour, "end_hour": end_hour})
+
+    return cursor.fetchall()
+
+def fetch_tlx_entries(user_id):
+    cursor = get_read_connection().execute('''
+        SELECT mental, physical, temporal, performance, effort, frustration
+        FROM tlx_entries
+        WHERE user_id = ?
+        ORDER BY timestamp ASC
     ''', (user_id,))
 
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return cursor.fetchall()
+
+def fetch_tlx_totals(user_id):
+    """ (dimension, count, sum, sum of squares, latest) per TLX dimension, from the running aggregate """
+    cursor = get_read_connection().execute('''
+        SELECT dimension, n, total, total_sq, latest
+        FROM tlx_totals
+        WHERE user_id = ?
+    ''', (user_id,))
+
+    return cursor.fetchall()
+
+def fetch_tlx_window(user_id, since_day):
+    """ (dimension, count, sum, sum of squares) over local days from since_day ('YYYY-MM-DD') on """
+    cursor = get_read_connection().execute('''
+        SELECT dimension, SUM(n), SUM(total), SUM(total_sq)
+        FROM tlx_daily
+        WHERE user_id = ? AND day >= ?
+        GROUP BY dimension
+    ''', (user_id, since_day))
+
+    return cursor.fetchall()
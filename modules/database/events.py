@@ -0,0 +1,66 @@
+# Event kinds that can be written asynchronously, and the INSERT each one maps
+# to. Payloads are plain dicts so they can be journalled as JSON and replayed.
+from datetime import datetime, timezone
+from modules.database.apps import bind_app_ids
+
+EVENT_STATEMENTS = {
+    "app_usage": """
+        INSERT INTO app_usage (user_id, app_id, title_id, start_time, end_time, duration, timestamp, start_ms, end_ms)
+        VALUES (:user_id, :app_id, :title_id, :start_time, :end_time, :duration, :timestamp,
+                COALESCE(:start_ms, (CAST(strftime('%s', :timestamp) AS INTEGER) - :duration) * 1000),
+                COALESCE(:end_ms, CAST(strftime('%s', :timestamp) AS INTEGER) * 1000))
+        """,
+    "tlx": """
+        INSERT INTO tlx_entries (user_id, mental, physical, temporal, performance, effort, frustration, timestamp)
+        VALUES (:user_id, :mental, :physical, :temporal, :performance, :effort, :frustration, :timestamp)
+        """,
+    "interruption": """
+        INSERT INTO manager_interruptions (user_id, timestamp)
+        VALUES (:user_id, :timestamp)
+        """,
+    "usability": """
+        INSERT INTO usability_feedback (user_id, score, timestamp)
+        VALUES (:user_id, :score, :timestamp)
+        """,
+    "task": """
+        INSERT INTO tasks (user_id, title, description, timestamp)
+        VALUES (:user_id, :title, :description, :timestamp)
+        """,
+}
+
+# Fields added after events were first journalled; older journal lines are
+# replayed with these filled in
+EVENT_DEFAULTS = {
+    "app_usage": {"start_ms": None, "end_ms": None, "process": None},
+}
+
+# Parameters a kind's INSERT needs from the database itself; payloads keep the
+# raw values (app_usage keeps the window title in "app" and its process in "process")
+EVENT_BINDERS = {
+    "app_usage": bind_app_ids,
+}
+
+
+def utc_timestamp():
+    """ Same format and timezone as SQLite's CURRENT_TIMESTAMP """
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def make_event(kind, **payload):
+    if kind not in EVENT_STATEMENTS:
+        raise ValueError(f"Unknown event kind {kind!r}")
+    # Stamp when it happened, not when the background writer gets to it
+    payload.setdefault("timestamp", utc_timestamp())
+    return kind, payload
+
+
+def event_params(kind, payload):
+    """ Payload as bound to the kind's INSERT """
+    defaults = EVENT_DEFAULTS.get(kind)
+    return {**defaults, **payload} if defaults else payload
+
+
+def bind_event_rows(kind, rows, db_path=None):
+    """ Complete a batch of event_params() rows in place; call before the transaction that inserts them """
+    binder = EVENT_BINDERS.get(kind)
+    return binder(rows, db_path) if binder else rows
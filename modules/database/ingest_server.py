@@ -0,0 +1,446 @@
+"""
+Central ingestion server for multi-seat deployments.
+
+Seats send batches of events (app usage, TLX, tasks, interruptions, usability
+scores) over local TCP or a Unix socket; the server writes them into one
+database and answers the same fetch_* queries the GUI runs locally, so a
+manager sees every seat. Requests from all connections that arrive while a
+commit is in progress are written together in the next transaction (group
+commit), and a client's events are only acknowledged once committed.
+
+    python -m modules.database.ingest_server --host 0.0.0.0 --port 8766
+    python -m modules.database.ingest_server --unix /tmp/tlx_ingest.sock
+    python -m modules.database.ingest_server --db /tmp/load.db --loopback-clients 16 --events 20000
+
+Messages are a 4-byte big-endian length followed by a JSON object:
+    {"op": "events", "events": [{"kind": "app_usage", "payload": {...}}, ...]}
+    {"op": "fetch", "name": "fetch_tasks_summary_page", "args": [0, 200]}
+    {"op": "sync", "seat_id": "...", "payload": <n>} + n bytes of zlib-compressed
+        JSON [[seq, kind, payload], ...] from a seat's spool (see sync.py)
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from modules.database import connection, db
+from modules.database.connection import close_thread_connections, get_connection, transaction
+from modules.database.events import EVENT_STATEMENTS, bind_event_rows, event_params, make_event
+
+HEADER = struct.Struct("!I")
+MAX_MESSAGE = 64 << 20
+MAX_BATCH_BYTES = 256 << 20  # decompressed sync batch
+
+# Read-only queries clients may run; fetch_user_by_email stays local (it returns password hashes)
+FETCHES = {
+    name: getattr(db, name) for name in (
+        "fetch_manager_interruptions", "fetch_tasks_summary", "fetch_tasks_summary_page",
+        "fetch_tasks_by_user", "fetch_tasks_page", "fetch_app_usage_totals", "fetch_app_usage_by_day",
+        "fetch_tlx_entries", "fetch_tlx_totals", "fetch_tlx_window", "query_usage",
+    )
+}
+
+
+def encode_message(message, payload=b""):
+    if payload:
+        message = dict(message, payload=len(payload))
+    data = json.dumps(message).encode()
+    return HEADER.pack(len(data)) + data + payload
+
+
+async def read_message(reader):
+    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_MESSAGE:
+        raise ValueError(f"message of {length} bytes is too large")
+    message = json.loads(await reader.readexactly(length))
+    size = message.get("payload", 0)
+    if size > MAX_MESSAGE:
+        raise ValueError(f"payload of {size} bytes is too large")
+    return message, await reader.readexactly(size)
+
+
+def decode_batch(payload):
+    decompressor = zlib.decompressobj()
+    data = decompressor.decompress(payload, MAX_BATCH_BYTES)
+    if decompressor.unconsumed_tail:
+        raise ValueError("sync batch is too large")
+    return json.loads(data)
+
+
+class IngestError(RuntimeError):
+    """ The server answered, but refused the request """
+
+
+class PendingWrite:
+    def __init__(self, events, seat_id=None, seqs=None):
+        self.events = events
+        # Spooled events from a seat carry sequence numbers; already applied ones are skipped
+        self.seat_id = seat_id
+        self.seqs = seqs
+        self.duplicates = 0
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class IngestServer:
+    def __init__(self, host="127.0.0.1", port=8766, unix_path=None, max_batch=5000):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        # Upper bound on events per transaction
+        self.max_batch = max_batch
+        self.stats = {"events": 0, "requests": 0, "commits": 0, "rejected": 0, "duplicates": 0}
+
+        self.server = None
+        self.pending = None
+        self.writer_task = None
+        # One thread owns the writing connection; reads go to a small pool
+        self.write_executor = ThreadPoolExecutor(1, thread_name_prefix="ingest-writer")
+        self.read_executor = ThreadPoolExecutor(4, thread_name_prefix="ingest-reader")
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    @property
+    def address(self):
+        if self.unix_path:
+            return self.unix_path
+        return self.server.sockets[0].getsockname()[:2]
+
+    def describe(self):
+        commits = max(self.stats["commits"], 1)
+        return (f"{self.stats['events']} events in {self.stats['commits']} commits "
+                f"(mean {self.stats['events'] / commits:.0f} per commit), {self.stats['rejected']} rejected, "
+                f"{self.stats['duplicates']} duplicates dropped")
+
+    # -- asyncio side --------------------------------------------------------
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.pending = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self.writer_loop())
+        if self.unix_path:
+            self.server = await asyncio.start_unix_server(self.handle_client, self.unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.ready.set()
+        async with self.server:
+            try:
+                await self.server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+        await self.pending.put(None)
+        await self.writer_task
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    message, payload = await read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                reply = await self.dispatch(message, payload)
+                writer.write(encode_message(reply))
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"❌ Ingest client dropped: {e}")
+        except asyncio.CancelledError:
+            pass  # server shutting down with the client still connected
+        finally:
+            writer.close()
+
+    async def dispatch(self, message, payload=b""):
+        op = message.get("op")
+        try:
+            if op == "events":
+                return await self.accept_events(message.get("events", []))
+            if op == "sync":
+                return await self.accept_sync(message["seat_id"], payload)
+            if op == "fetch":
+                function = FETCHES.get(message.get("name"))
+                if function is None:
+                    return {"ok": False, "error": f"unknown query {message.get('name')!r}"}
+                rows = await self.loop.run_in_executor(self.read_executor, function, *message.get("args", []))
+                return {"ok": True, "rows": rows}
+            if op == "stats":
+                return {"ok": True, "stats": self.stats}
+            return {"ok": False, "error": f"unknown op {op!r}"}
+        except (KeyError, TypeError, ValueError, zlib.error, sqlite3.Error) as e:
+            return {"ok": False, "error": str(e)}
+
+    async def accept_events(self, raw_events):
+        # Validate up front, so one malformed event fails only its own request
+        events = []
+        for event in raw_events:
+            kind, payload = make_event(event["kind"], **event["payload"])
+            events.append((kind, event_params(kind, payload)))
+        if not events:
+            return {"ok": True, "accepted": 0}
+
+        pending = PendingWrite(events)
+        await self.pending.put(pending)
+        error = await pending.future
+        if error:
+            return {"ok": False, "error": error}
+        return {"ok": True, "accepted": len(events)}
+
+    async def accept_sync(self, seat_id, payload):
+        events = []
+        seqs = []
+        for seq, kind, event_payload in decode_batch(payload):
+            kind, event_payload = make_event(kind, **event_payload)
+            events.append((kind, event_params(kind, event_payload)))
+            seqs.append(int(seq))
+        if not events:
+            return {"ok": True, "acked": 0}
+
+        pending = PendingWrite(events, seat_id, seqs)
+        await self.pending.put(pending)
+        error = await pending.future
+        if error:
+            return {"ok": False, "error": error}
+        # Applied now or before: either way the seat can drop everything up to here
+        return {"ok": True, "acked": max(seqs), "duplicates": pending.duplicates}
+
+    async def writer_loop(self):
+        while True:
+            first = await self.pending.get()
+            if first is None:
+                break
+            # Everything that queued up during the previous commit goes into this one
+            group = [first]
+            count = len(first.events)
+            stop = False
+            while count < self.max_batch and not self.pending.empty():
+                item = self.pending.get_nowait()
+                if item is None:
+                    stop = True
+                    break
+                group.append(item)
+                count += len(item.events)
+
+            errors = await self.loop.run_in_executor(self.write_executor, self.commit_group, group)
+            for pending, error in zip(group, errors):
+                pending.future.set_result(error)
+            if stop:
+                break
+
+    # -- writer thread -------------------------------------------------------
+
+    def commit_group(self, group):
+        try:
+            self.write_events(group)
+            self.stats["commits"] += 1
+            errors = [None] * len(group)
+        except sqlite3.Error:
+            # Something in the group is bad: commit request by request to find it
+            errors = []
+            for pending in group:
+                try:
+                    self.write_events([pending])
+                    self.stats["commits"] += 1
+                    errors.append(None)
+                except sqlite3.Error as e:
+                    self.stats["rejected"] += len(pending.events)
+                    errors.append(str(e))
+
+        accepted = [pending for pending, error in zip(group, errors) if error is None]
+        self.stats["requests"] += len(accepted)
+        self.stats["events"] += sum(len(pending.events) - pending.duplicates for pending in accepted)
+        self.stats["duplicates"] += sum(pending.duplicates for pending in accepted)
+        if any(kind == "task" for pending in accepted for kind, _ in pending.events):
+            db.invalidate_task_summaries()
+        return errors
+
+    def write_events(self, group):
+        # Before the transaction, so new app ids are committed and cached on their own
+        unbound = {}
+        for pending in group:
+            for kind, params in pending.events:
+                unbound.setdefault(kind, []).append(params)
+        for kind, rows in unbound.items():
+            bind_event_rows(kind, rows)
+
+        with transaction() as conn:
+            by_kind = {}
+            watermarks = {}
+            for pending in group:
+                events = pending.events
+                if pending.seat_id is not None:
+                    events = self.new_seat_events(conn, pending, watermarks)
+                for kind, params in events:
+                    by_kind.setdefault(kind, []).append(params)
+
+            for kind, rows in by_kind.items():
+                conn.executemany(EVENT_STATEMENTS[kind], rows)
+            # Same transaction as the rows, so a batch is applied exactly once
+            conn.executemany(
+                "INSERT OR REPLACE INTO seat_sync (seat_id, last_seq) VALUES (?, ?)",
+                watermarks.items()
+            )
+
+    def new_seat_events(self, conn, pending, watermarks):
+        seat = pending.seat_id
+        if seat not in watermarks:
+            row = conn.execute("SELECT last_seq FROM seat_sync WHERE seat_id = ?", (seat,)).fetchone()
+            watermarks[seat] = row[0] if row else 0
+
+        fresh = []
+        for seq, event in zip(pending.seqs, pending.events):
+            if seq > watermarks[seat]:
+                fresh.append(event)
+                watermarks[seat] = seq
+        pending.duplicates = len(pending.events) - len(fresh)
+        return fresh
+
+    # -- running in a background thread --------------------------------------
+
+    def start(self):
+        self.thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name="ingest-server", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self):
+        if self.loop is not None and self.server is not None:
+            self.loop.call_soon_threadsafe(self.server.close)
+        if self.thread is not None:
+            self.thread.join(10.0)
+            self.thread = None
+        self.write_executor.submit(close_thread_connections).result()
+        self.write_executor.shutdown()
+        self.read_executor.shutdown()
+
+
+class IngestClient:
+    """ Blocking client for seats and scripts """
+
+    def __init__(self, host="127.0.0.1", port=8766, unix_path=None, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.timeout = timeout
+        self.sock = None
+
+    def connect(self):
+        if self.unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(self.unix_path)
+        else:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def call(self, message, payload=b""):
+        if self.sock is None:
+            self.connect()
+        try:
+            self.sock.sendall(encode_message(message, payload))
+            (length,) = HEADER.unpack(self.recv_exact(HEADER.size))
+            reply = json.loads(self.recv_exact(length))
+        except (OSError, ConnectionError):
+            self.close()
+            raise
+        if not reply.get("ok"):
+            raise IngestError(reply.get("error", "ingest server error"))
+        return reply
+
+    def recv_exact(self, size):
+        chunks = []
+        while size:
+            chunk = self.sock.recv(min(size, 1 << 20))
+            if not chunk:
+                raise ConnectionError("connection closed")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def send_events(self, events):
+        """ events: iterable of (kind, payload dict); returns once they are committed """
+        return self.call({
+            "op": "events",
+            "events": [{"kind": kind, "payload": payload} for kind, payload in events],
+        })["accepted"]
+
+    def fetch(self, name, *args):
+        return [tuple(row) for row in self.call({"op": "fetch", "name": name, "args": list(args)})["rows"]]
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+def run_loopback(server, clients, events, batch=100):
+    """ N clients sending app usage events at once; returns total events per second """
+    done = []
+
+    def client(index):
+        if server.unix_path:
+            ingest = IngestClient(unix_path=server.unix_path)
+        else:
+            ingest = IngestClient(*server.address)
+        user_id = 10000 + index
+        sent = 0
+        while sent < events:
+            size = min(batch, events - sent)
+            ingest.send_events(
+                ("app_usage", {"user_id": user_id, "app": f"app{(sent + i) % 20}", "start_time": None,
+                               "end_time": None, "duration": 2})
+                for i in range(size)
+            )
+            sent += size
+        ingest.fetch("fetch_app_usage_totals", user_id)
+        ingest.close()
+        done.append(sent)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return sum(done) / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database file (default: the app database)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=5000, help="most events per transaction")
+    parser.add_argument("--loopback-clients", type=int, help="run N local clients against the server and exit")
+    parser.add_argument("--events", type=int, default=10000, help="events per loopback client")
+    parser.add_argument("--batch", type=int, default=100, help="events per loopback request")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        # The fetch_* queries read the default database
+        connection.DB_PATH = args.db
+    from modules.database.migrations import migrate
+    migrate(get_connection())
+
+    port = 0 if args.loopback_clients else args.port  # any free port
+    server = IngestServer(args.host, port, unix_path=args.unix, max_batch=args.max_batch)
+    server.start()
+    print(f"Ingest server on {server.address}")
+
+    try:
+        if args.loopback_clients:
+            rate = run_loopback(server, args.loopback_clients, args.events, args.batch)
+            print(f"{args.loopback_clients} clients: {rate:,.0f} events/s total, {server.describe()}")
+        else:
+            server.thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,619 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in PRAGMA user_version. Each migration runs once, in
+its own transaction together with the version bump, so a database is never
+left half-migrated. Append new migrations to MIGRATIONS; never edit one that
+has shipped.
+
+    python -m modules.database.migrations            # migrate the app database
+    python -m modules.database.migrations --check    # also verify the hot query plans
+"""
+import argparse
+import sys
+from modules.database.apps import app_for_title, clean_title
+from modules.database.connection import get_connection
+
+BASE_SCHEMA = [
+    # Users table
+    """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT CHECK(role IN ('employee', 'manager')) NOT NULL
+        )
+    """,
+    # TLX Entries table
+    """
+        CREATE TABLE IF NOT EXISTS tlx_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            mental INTEGER,
+            physical INTEGER,
+            temporal INTEGER,
+            performance INTEGER,
+            effort INTEGER,
+            frustration INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """,
+    # App Usage table
+    """
+        CREATE TABLE IF NOT EXISTS app_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            app TEXT,
+            start_time TEXT,
+            end_time TEXT,
+            duration INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """,
+    # Manager Interruption table
+    """
+        CREATE TABLE IF NOT EXISTS manager_interruptions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """,
+    # Usability Feedback table
+    """
+        CREATE TABLE IF NOT EXISTS usability_feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            score INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """,
+    # Tasks table
+    """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            title TEXT,
+            description TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """,
+]
+
+
+def column_names(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def rename_usability_score(conn):
+    # Databases created by the first release call the column usability_score,
+    # while every insert has always used score
+    if "usability_score" in column_names(conn, "usability_feedback"):
+        conn.execute("ALTER TABLE usability_feedback RENAME COLUMN usability_score TO score")
+
+
+def register_app_functions(conn):
+    # The same title -> app split the writers use (apps.py), for the backfill
+    conn.create_function("clean_title", 1, clean_title, deterministic=True)
+    conn.create_function("app_for_title", 1, app_for_title, deterministic=True)
+
+
+TLX_DIMENSIONS = ("mental", "physical", "temporal", "performance", "effort", "frustration")
+
+
+def tlx_aggregate_trigger(latest_update):
+    """ The AFTER INSERT trigger behind tlx_totals and tlx_daily; latest_update is its SET clause for latest """
+    # Empty answers (NULL, e.g. rows imported from a CSV) are skipped per dimension
+    trigger_body = ""
+    for dim in TLX_DIMENSIONS:
+        trigger_body += f"""
+                INSERT INTO tlx_totals (user_id, dimension, n, total, total_sq, latest, latest_at)
+                SELECT NEW.user_id, '{dim}', 1, NEW.{dim}, NEW.{dim} * NEW.{dim}, NEW.{dim}, NEW.timestamp
+                WHERE NEW.{dim} IS NOT NULL
+                ON CONFLICT (user_id, dimension) DO UPDATE SET
+                    n = n + 1, total = total + excluded.total, total_sq = total_sq + excluded.total_sq,
+                    {latest_update};
+                INSERT INTO tlx_daily (user_id, day, dimension, n, total, total_sq)
+                SELECT NEW.user_id, date(NEW.timestamp, 'localtime'), '{dim}', 1, NEW.{dim}, NEW.{dim} * NEW.{dim}
+                WHERE NEW.{dim} IS NOT NULL
+                ON CONFLICT (user_id, day, dimension) DO UPDATE SET
+                    n = n + 1, total = total + excluded.total, total_sq = total_sq + excluded.total_sq;"""
+    return f"""
+            CREATE TRIGGER IF NOT EXISTS trg_tlx_aggregates AFTER INSERT ON tlx_entries
+            WHEN NEW.user_id IS NOT NULL
+            BEGIN{trigger_body}
+            END
+        """
+
+
+def tlx_latest_in_order_steps():
+    """ Keep the newest answer as latest even when older entries arrive later (bulk import, sync) """
+    steps = [
+        "DROP TRIGGER IF EXISTS trg_tlx_aggregates",
+        tlx_aggregate_trigger(
+            "latest = CASE WHEN latest_at IS NULL OR excluded.latest_at >= latest_at"
+            " THEN excluded.latest ELSE latest END,"
+            " latest_at = CASE WHEN latest_at IS NULL OR excluded.latest_at >= latest_at"
+            " THEN excluded.latest_at ELSE latest_at END"
+        ),
+    ]
+    # Repair what out-of-order inserts may already have overwritten
+    for dim in TLX_DIMENSIONS:
+        steps.append(f"""
+            UPDATE tlx_totals SET
+                latest = (SELECT e.{dim} FROM tlx_entries e WHERE e.user_id = tlx_totals.user_id AND e.{dim} IS NOT NULL
+                          ORDER BY e.timestamp DESC, e.id DESC LIMIT 1),
+                latest_at = (SELECT MAX(e.timestamp) FROM tlx_entries e
+                             WHERE e.user_id = tlx_totals.user_id AND e.{dim} IS NOT NULL)
+            WHERE dimension = '{dim}'
+        """)
+    return steps
+
+
+def tlx_aggregate_steps():
+    """ Running count / sum / sum of squares per user and dimension, overall and per local day """
+    steps = [
+        """
+            CREATE TABLE IF NOT EXISTS tlx_totals (
+                user_id INTEGER NOT NULL,
+                dimension TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                total REAL NOT NULL,
+                total_sq REAL NOT NULL,
+                latest REAL,
+                latest_at TEXT,
+                PRIMARY KEY (user_id, dimension)
+            ) WITHOUT ROWID
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS tlx_daily (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                total REAL NOT NULL,
+                total_sq REAL NOT NULL,
+                PRIMARY KEY (user_id, day, dimension)
+            ) WITHOUT ROWID
+        """,
+    ]
+
+    steps.append(tlx_aggregate_trigger("latest = excluded.latest, latest_at = excluded.latest_at"))
+
+    # Backfill from the existing entries
+    for dim in TLX_DIMENSIONS:
+        steps.append(f"""
+            INSERT OR REPLACE INTO tlx_totals (user_id, dimension, n, total, total_sq, latest, latest_at)
+            SELECT user_id, '{dim}', COUNT({dim}), SUM({dim}), SUM({dim} * {dim}),
+                (SELECT {dim} FROM tlx_entries l WHERE l.user_id = e.user_id AND l.{dim} IS NOT NULL
+                 ORDER BY l.timestamp DESC, l.id DESC LIMIT 1),
+                MAX(timestamp)
+            FROM tlx_entries e
+            WHERE user_id IS NOT NULL AND {dim} IS NOT NULL
+            GROUP BY user_id
+        """)
+        steps.append(f"""
+            INSERT OR REPLACE INTO tlx_daily (user_id, day, dimension, n, total, total_sq)
+            SELECT user_id, date(timestamp, 'localtime'), '{dim}', COUNT({dim}), SUM({dim}), SUM({dim} * {dim})
+            FROM tlx_entries
+            WHERE user_id IS NOT NULL AND {dim} IS NOT NULL AND timestamp IS NOT NULL
+            GROUP BY user_id, date(timestamp, 'localtime')
+        """)
+    return steps
+
+
+# (version, description, steps); a step is an SQL string or a callable(conn)
+MIGRATIONS = [
+    (1, "base schema", BASE_SCHEMA),
+    (2, "write-behind journal state", [
+        """
+            CREATE TABLE IF NOT EXISTS write_journal_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_seq INTEGER NOT NULL
+            )
+        """,
+    ]),
+    (3, "usability_feedback.score column", [rename_usability_score]),
+    (4, "per-user indexes", [
+        # Every per-user read is WHERE user_id = ? [ORDER BY timestamp]
+        "CREATE INDEX IF NOT EXISTS idx_tlx_entries_user_time ON tlx_entries (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_user_time ON app_usage (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_manager_interruptions_user_time ON manager_interruptions (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_usability_feedback_user_time ON usability_feedback (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_user_time ON tasks (user_id, timestamp)",
+        # Covering index: the per-app totals are answered from the index alone
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_user_app_duration ON app_usage (user_id, app, duration)",
+        "ANALYZE",
+    ]),
+    (5, "daily app usage aggregate", [
+        # One row per user, local day and app, kept current by a trigger so the
+        # summary never has to sum the raw history
+        """
+            CREATE TABLE IF NOT EXISTS app_usage_daily (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                app TEXT NOT NULL,
+                duration INTEGER NOT NULL,
+                PRIMARY KEY (user_id, day, app)
+            ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_daily_user_app ON app_usage_daily (user_id, app, duration)",
+        """
+            CREATE TRIGGER IF NOT EXISTS trg_app_usage_daily AFTER INSERT ON app_usage
+            WHEN NEW.user_id IS NOT NULL AND NEW.app IS NOT NULL AND NEW.duration IS NOT NULL
+            BEGIN
+                INSERT INTO app_usage_daily (user_id, day, app, duration)
+                VALUES (NEW.user_id, date(NEW.timestamp, 'localtime'), NEW.app, NEW.duration)
+                ON CONFLICT (user_id, day, app) DO UPDATE SET duration = duration + excluded.duration;
+            END
+        """,
+        # Backfill from the existing history
+        """
+            INSERT OR REPLACE INTO app_usage_daily (user_id, day, app, duration)
+            SELECT user_id, date(timestamp, 'localtime'), app, SUM(duration)
+            FROM app_usage
+            WHERE user_id IS NOT NULL AND app IS NOT NULL AND duration IS NOT NULL AND timestamp IS NOT NULL
+            GROUP BY user_id, date(timestamp, 'localtime'), app
+        """,
+    ]),
+    (6, "running TLX aggregates", tlx_aggregate_steps()),
+    (7, "hourly app usage rollups", [
+        # Raw app_usage rows past the retention horizon are compacted into these
+        # buckets by rollup.py; hour is the UTC hour, like the raw timestamps
+        """
+            CREATE TABLE IF NOT EXISTS app_usage_hourly (
+                user_id INTEGER NOT NULL,
+                hour TEXT NOT NULL,
+                app TEXT NOT NULL,
+                duration INTEGER NOT NULL,
+                sessions INTEGER NOT NULL,
+                PRIMARY KEY (user_id, hour, app)
+            ) WITHOUT ROWID
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                rolled_until TEXT NOT NULL
+            )
+        """,
+        # The rollup job selects raw rows by age across all users
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_time ON app_usage (timestamp)",
+    ]),
+    (8, "app usage intervals in epoch milliseconds", [
+        "ALTER TABLE app_usage ADD COLUMN start_ms INTEGER",
+        "ALTER TABLE app_usage ADD COLUMN end_ms INTEGER",
+        # Old rows only have wall-clock HH:MM:SS strings; the row timestamp (UTC)
+        # was taken when the interval ended, so derive both ends from it
+        """
+            UPDATE app_usage SET
+                end_ms = CAST(strftime('%s', timestamp) AS INTEGER) * 1000,
+                start_ms = (CAST(strftime('%s', timestamp) AS INTEGER) - COALESCE(duration, 0)) * 1000
+            WHERE start_ms IS NULL AND timestamp IS NOT NULL
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_user_start ON app_usage (user_id, start_ms, end_ms, app)",
+        # query_usage() only looks an hour back from the window start on the main
+        # index; the rare longer intervals are found through this small index
+        """
+            CREATE INDEX IF NOT EXISTS idx_app_usage_long ON app_usage (user_id, start_ms, end_ms, app)
+            WHERE end_ms - start_ms > 3600000
+        """,
+    ]),
+    (9, "distraction events", [
+        # Task / noise / phone events of the distraction experiments (background_noise.py, phone_call.py)
+        """
+            CREATE TABLE IF NOT EXISTS distraction_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                source TEXT NOT NULL,
+                event TEXT NOT NULL,
+                elapsed REAL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_distraction_events_user_time ON distraction_events (user_id, timestamp)",
+    ]),
+    (10, "seat to central sync", [
+        # Seat side: events waiting to be shipped, written in the same transaction
+        # as the local rows (see sync.py)
+        """
+            CREATE TABLE IF NOT EXISTS sync_spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                seat_id TEXT NOT NULL,
+                acked_seq INTEGER NOT NULL DEFAULT 0
+            )
+        """,
+        "INSERT OR IGNORE INTO sync_state (id, seat_id) VALUES (1, lower(hex(randomblob(8))))",
+        # Central side: highest sequence number applied per seat, so resent batches are dropped
+        """
+            CREATE TABLE IF NOT EXISTS seat_sync (
+                seat_id TEXT PRIMARY KEY,
+                last_seq INTEGER NOT NULL
+            )
+        """,
+    ]),
+    (11, "interned app identities", [
+        # Window titles move out of app_usage into two small dimension tables;
+        # app_usage and its aggregates keep integer ids (see apps.py)
+        """
+            CREATE TABLE IF NOT EXISTS apps (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS app_titles (
+                id INTEGER PRIMARY KEY,
+                app_id INTEGER NOT NULL REFERENCES apps(id),
+                title TEXT NOT NULL UNIQUE
+            )
+        """,
+        register_app_functions,
+        """
+            INSERT OR IGNORE INTO apps (name)
+            SELECT DISTINCT app_for_title(app) FROM (
+                SELECT app FROM app_usage
+                UNION SELECT app FROM app_usage_daily
+                UNION SELECT app FROM app_usage_hourly
+            )
+        """,
+        """
+            INSERT OR IGNORE INTO app_titles (app_id, title)
+            SELECT a.id, t.title
+            FROM (
+                SELECT DISTINCT clean_title(app) AS title FROM (
+                    SELECT app FROM app_usage
+                    UNION SELECT app FROM app_usage_daily
+                    UNION SELECT app FROM app_usage_hourly
+                )
+            ) t
+            JOIN apps a ON a.name = app_for_title(t.title)
+            WHERE t.title != a.name
+        """,
+        # Rebuild the three tables without the text column
+        "DROP TRIGGER IF EXISTS trg_app_usage_daily",
+        """
+            CREATE TABLE app_usage_interned (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                app_id INTEGER NOT NULL REFERENCES apps(id),
+                title_id INTEGER REFERENCES app_titles(id),
+                start_time TEXT,
+                end_time TEXT,
+                duration INTEGER,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                start_ms INTEGER,
+                end_ms INTEGER,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """,
+        """
+            INSERT INTO app_usage_interned
+                (id, user_id, app_id, title_id, start_time, end_time, duration, timestamp, start_ms, end_ms)
+            SELECT u.id, u.user_id, a.id, t.id, u.start_time, u.end_time, u.duration, u.timestamp, u.start_ms, u.end_ms
+            FROM app_usage u
+            JOIN apps a ON a.name = app_for_title(u.app)
+            LEFT JOIN app_titles t ON t.title = clean_title(u.app)
+            ORDER BY u.id
+        """,
+        "DROP TABLE app_usage",
+        "ALTER TABLE app_usage_interned RENAME TO app_usage",
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_user_time ON app_usage (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_time ON app_usage (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_user_start ON app_usage (user_id, start_ms, end_ms, app_id)",
+        """
+            CREATE INDEX IF NOT EXISTS idx_app_usage_long ON app_usage (user_id, start_ms, end_ms, app_id)
+            WHERE end_ms - start_ms > 3600000
+        """,
+        # Title variants of one app merge into one aggregate row
+        """
+            CREATE TABLE app_usage_daily_interned (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                app_id INTEGER NOT NULL,
+                duration INTEGER NOT NULL,
+                PRIMARY KEY (user_id, day, app_id)
+            ) WITHOUT ROWID
+        """,
+        """
+            INSERT INTO app_usage_daily_interned (user_id, day, app_id, duration)
+            SELECT d.user_id, d.day, a.id, SUM(d.duration)
+            FROM app_usage_daily d JOIN apps a ON a.name = app_for_title(d.app)
+            GROUP BY d.user_id, d.day, a.id
+        """,
+        "DROP TABLE app_usage_daily",
+        "ALTER TABLE app_usage_daily_interned RENAME TO app_usage_daily",
+        "CREATE INDEX IF NOT EXISTS idx_app_usage_daily_user_app ON app_usage_daily (user_id, app_id, duration)",
+        """
+            CREATE TRIGGER IF NOT EXISTS trg_app_usage_daily AFTER INSERT ON app_usage
+            WHEN NEW.user_id IS NOT NULL AND NEW.duration IS NOT NULL
+            BEGIN
+                INSERT INTO app_usage_daily (user_id, day, app_id, duration)
+                VALUES (NEW.user_id, date(NEW.timestamp, 'localtime'), NEW.app_id, NEW.duration)
+                ON CONFLICT (user_id, day, app_id) DO UPDATE SET duration = duration + excluded.duration;
+            END
+        """,
+        """
+            CREATE TABLE app_usage_hourly_interned (
+                user_id INTEGER NOT NULL,
+                hour TEXT NOT NULL,
+                app_id INTEGER NOT NULL,
+                duration INTEGER NOT NULL,
+                sessions INTEGER NOT NULL,
+                PRIMARY KEY (user_id, hour, app_id)
+            ) WITHOUT ROWID
+        """,
+        """
+            INSERT INTO app_usage_hourly_interned (user_id, hour, app_id, duration, sessions)
+            SELECT h.user_id, h.hour, a.id, SUM(h.duration), SUM(h.sessions)
+            FROM app_usage_hourly h JOIN apps a ON a.name = app_for_title(h.app)
+            GROUP BY h.user_id, h.hour, a.id
+        """,
+        "DROP TABLE app_usage_hourly",
+        "ALTER TABLE app_usage_hourly_interned RENAME TO app_usage_hourly",
+    ]),
+    (12, "latest TLX answer by time, not by insert order", tlx_latest_in_order_steps()),
+    (13, "window titles unique per app", [
+        # Apps are now processes, and two programs can show the same title
+        # ("Untitled"), so a title is only unique within its app. Ids are kept.
+        """
+            CREATE TABLE app_titles_per_app (
+                id INTEGER PRIMARY KEY,
+                app_id INTEGER NOT NULL REFERENCES apps(id),
+                title TEXT NOT NULL,
+                UNIQUE (app_id, title)
+            )
+        """,
+        "INSERT INTO app_titles_per_app (id, app_id, title) SELECT id, app_id, title FROM app_titles",
+        "DROP TABLE app_titles",
+        "ALTER TABLE app_titles_per_app RENAME TO app_titles",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn=None, target=SCHEMA_VERSION):
+    """ Apply every migration newer than the database's user_version; returns the new version """
+    conn = conn or get_connection()
+    current = schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{current} is newer than this build (v{SCHEMA_VERSION})")
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+        # BEGIN IMMEDIATE takes the write lock up front, so two instances
+        # starting together cannot both apply the same migration
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"✅ Database migrated to v{version}: {description}")
+        current = version
+    return current
+
+
+# Queries the GUI runs all the time, with the plan steps that are expected
+# for them. Any other full SCAN or temp b-tree sort means an index is missing
+# or not used.
+HOT_QUERIES = [
+    ("tlx entries for user", """
+        SELECT mental, physical, temporal, performance, effort, frustration
+        FROM tlx_entries WHERE user_id = ? ORDER BY timestamp ASC
+    """, (1,), ()),
+    ("app usage totals for user", """
+        SELECT a.name, SUM(d.duration)
+        FROM app_usage_daily d JOIN apps a ON a.id = d.app_id
+        WHERE d.user_id = ? GROUP BY d.app_id
+    """, (1,), ()),
+    ("app usage by day for user", """
+        SELECT d.day, a.name, d.duration
+        FROM app_usage_daily d JOIN apps a ON a.id = d.app_id
+        WHERE d.user_id = ? AND d.day >= ?
+    """, (1, "2000-01-01"), ()),
+    ("tlx totals for user", """
+        SELECT dimension, n, total, total_sq, latest FROM tlx_totals WHERE user_id = ?
+    """, (1,), ()),
+    ("tlx window for user", """
+        SELECT dimension, SUM(n), SUM(total), SUM(total_sq) FROM tlx_daily
+        WHERE user_id = ? AND day >= ? GROUP BY dimension
+    """, (1, "2000-01-01"), ("USE TEMP B-TREE FOR GROUP BY",)),  # at most 30 days x 6 rows
+    ("app usage intervals for user", """
+        SELECT app_id, start_ms, end_ms FROM app_usage
+        WHERE user_id = ? AND start_ms >= ? AND start_ms < ? AND end_ms > ?
+    """, (1, 0, 1, 0), ()),
+    ("long app usage intervals for user", """
+        SELECT app_id, start_ms, end_ms FROM app_usage
+        WHERE user_id = ? AND end_ms - start_ms > 3600000 AND start_ms < ? AND end_ms > ?
+    """, (1, 0, 0), ()),
+    ("app usage hourly range for user", """
+        SELECT app_id, SUM(duration) FROM app_usage_hourly
+        WHERE user_id = ? AND hour >= ? AND hour < ? GROUP BY app_id
+    """, (1, "2000-01-01", "2100-01-01"), ("USE TEMP B-TREE FOR GROUP BY",)),
+    ("manager interruptions for user", """
+        SELECT timestamp FROM manager_interruptions WHERE user_id = ? ORDER BY timestamp
+    """, (1,), ()),
+    ("tasks for user", """
+        SELECT title, description, timestamp FROM tasks WHERE user_id = ? ORDER BY timestamp
+    """, (1,), ()),
+    # With few users, scanning them is the cheaper plan; the per-user count must still use the index
+    ("task summary page", """
+        SELECT u.id, u.name, (SELECT COUNT(*) FROM tasks t WHERE t.user_id = u.id)
+        FROM users u WHERE u.id > ? ORDER BY u.id LIMIT ?
+    """, (0, 200), ("SCAN u",)),
+    ("task page for user", """
+        SELECT id, title, description, timestamp FROM tasks
+        WHERE user_id = ? AND (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT ?
+    """, (1, "2100-01-01", 0, 50), ()),
+    ("task counts per user", """
+        SELECT u.id, u.name, COUNT(t.id)
+        FROM users u LEFT JOIN tasks t ON u.id = t.user_id
+        GROUP BY u.id
+    """, (), ("SCAN u",)),
+]
+
+
+def check_query_plans(conn=None, queries=HOT_QUERIES):
+    """ Run EXPLAIN QUERY PLAN on the hot queries; returns a list of (name, problem) """
+    conn = conn or get_connection()
+    problems = []
+    for name, sql, params, allowed in queries:
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+            detail = row[-1]
+            suspicious = detail.startswith("SCAN ") or "USE TEMP B-TREE" in detail
+            if suspicious and not any(detail.startswith(step) for step in allowed):
+                problems.append((name, detail))
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database file (default: the app database)")
+    parser.add_argument("--check", action="store_true", help="verify that the hot queries use indexes")
+    args = parser.parse_args(argv)
+
+    conn = get_connection(args.db)
+    version = migrate(conn)
+    print(f"Schema version: {version}")
+
+    if args.check:
+        problems = check_query_plans(conn)
+        for name, detail in problems:
+            print(f"❌ {name}: {detail}")
+        if problems:
+            return 1
+        print(f"✅ All {len(HOT_QUERIES)} hot queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
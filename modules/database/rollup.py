@@ -0,0 +1,166 @@
+"""
+Retention compaction for app_usage.
+
+Raw rows older than the horizon are folded into per-user, per-app hourly
+buckets (app_usage_hourly) and deleted. Per-day totals already live in
+app_usage_daily, which is maintained on insert and is not touched here.
+
+Work is done in chunks of chunk_hours, each in its own transaction together
+with the progress marker in rollup_state, so an interrupted run simply
+resumes at the last committed chunk. Range queries read the buckets plus the
+remaining raw rows (see query_usage in db.py).
+
+    python -m modules.database.rollup --raw-days 30
+
+The app itself keeps RAW_DAYS of raw rows: TLX_RAW_DAYS, or 30 days.
+"""
+import argparse
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from modules.database.connection import close_thread_connections, get_connection, transaction
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def raw_days_setting(default=30):
+    """ Raw-retention horizon in days from TLX_RAW_DAYS """
+    value = os.environ.get("TLX_RAW_DAYS", "")
+    if not value:
+        return default
+    try:
+        days = int(value)
+        if days < 1:
+            raise ValueError
+        return days
+    except ValueError:
+        print(f"❌ TLX_RAW_DAYS={value!r} is not a positive number of days; keeping {default}")
+        return default
+
+
+RAW_DAYS = raw_days_setting()
+
+# Every raw row before the chunk end moves (not just those after the previous
+# marker), so rows that arrive late with an old timestamp are picked up too
+ROLLUP_SQL = """
+    INSERT INTO app_usage_hourly (user_id, hour, app_id, duration, sessions)
+    SELECT user_id, strftime('%Y-%m-%d %H:00:00', timestamp), app_id, SUM(duration), COUNT(*)
+    FROM app_usage
+    WHERE timestamp < ? AND user_id IS NOT NULL AND duration IS NOT NULL
+    GROUP BY user_id, strftime('%Y-%m-%d %H:00:00', timestamp), app_id
+    ON CONFLICT (user_id, hour, app_id) DO UPDATE SET
+        duration = duration + excluded.duration, sessions = sessions + excluded.sessions
+"""
+DELETE_SQL = "DELETE FROM app_usage WHERE timestamp < ?"
+
+
+def parse_time(text):
+    return datetime.strptime(text, TIME_FORMAT)
+
+
+def format_time(moment):
+    return moment.strftime(TIME_FORMAT)
+
+
+class RollupJob:
+    def __init__(self, db_path=None, raw_days=30, chunk_hours=24, interval=6 * 3600):
+        self.db_path = db_path
+        # Raw rows younger than this stay untouched
+        self.raw_days = raw_days
+        self.chunk_hours = chunk_hours
+        # Seconds between runs when started as a background thread
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def cutoff(self, now=None):
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        # Whole hours only, so a bucket is never split between a run and the next
+        return (now - timedelta(days=self.raw_days)).replace(minute=0, second=0, microsecond=0)
+
+    def rolled_until(self):
+        row = get_connection(self.db_path).execute(
+            "SELECT rolled_until FROM rollup_state WHERE id = 1"
+        ).fetchone()
+        return parse_time(row[0]) if row else None
+
+    def oldest_raw(self):
+        row = get_connection(self.db_path).execute("SELECT MIN(timestamp) FROM app_usage").fetchone()
+        return parse_time(row[0]).replace(minute=0, second=0) if row[0] else None
+
+    def run_once(self, now=None):
+        """ Compact everything older than the horizon; returns the number of raw rows removed """
+        cutoff = self.cutoff(now)
+        start = self.rolled_until() or self.oldest_raw()
+        if start is None:
+            return 0
+
+        removed = 0
+        chunk_end = min(start + timedelta(hours=self.chunk_hours), cutoff)
+        while not self.stop_event.is_set():
+            removed += self.compact_chunk(chunk_end)
+            if chunk_end >= cutoff:
+                break
+            chunk_end = min(chunk_end + timedelta(hours=self.chunk_hours), cutoff)
+        return removed
+
+    def compact_chunk(self, chunk_end):
+        end = format_time(chunk_end)
+        with transaction(self.db_path) as conn:
+            conn.execute(ROLLUP_SQL, (end,))
+            removed = conn.execute(DELETE_SQL, (end,)).rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO rollup_state (id, rolled_until) "
+                "VALUES (1, MAX(?, COALESCE((SELECT rolled_until FROM rollup_state WHERE id = 1), '')))",
+                (end,)
+            )
+        return removed
+
+    # -- background thread -------------------------------------------------
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="db-rollup", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10.0):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    removed = self.run_once()
+                    if removed:
+                        print(f"✅ Compacted {removed} old app usage rows into hourly buckets")
+                except Exception as e:
+                    print(f"❌ App usage rollup failed: {e}")
+                self.stop_event.wait(self.interval)
+        finally:
+            close_thread_connections()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="database file (default: the app database)")
+    parser.add_argument("--raw-days", type=int, default=RAW_DAYS, help=f"keep raw rows for this many days (default {RAW_DAYS})")
+    parser.add_argument("--chunk-hours", type=int, default=24, help="hours compacted per transaction")
+    parser.add_argument("--vacuum", action="store_true", help="return the freed pages to the filesystem")
+    args = parser.parse_args(argv)
+
+    from modules.database.migrations import migrate
+    conn = get_connection(args.db)
+    migrate(conn)
+
+    job = RollupJob(args.db, raw_days=args.raw_days, chunk_hours=args.chunk_hours)
+    removed = job.run_once()
+    print(f"Compacted {removed} raw rows; raw data now starts at {job.rolled_until()}")
+    if args.vacuum:
+        conn.execute("VACUUM")
+
+
+if __name__ == "__main__":
+    main()
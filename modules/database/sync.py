@@ -0,0 +1,222 @@
+"""
+Seat-side spool and sync worker for a central ingestion server.
+
+When TLX_SYNC_SERVER is set ("host:port" or "unix:/path/to.sock"), every event
+written locally is also appended to the sync_spool table in the same
+transaction, so nothing written on this seat can be missed by the sync. A
+background SyncWorker ships the spool upstream in zlib-compressed batches.
+Rows are deleted only after the server acknowledges them, and failed sends
+are retried with exponential backoff. The server remembers the highest
+sequence number it has applied per seat, so a batch that is resent after a
+lost acknowledgement is not applied twice. When the server refuses a batch
+(as opposed to not answering), its events are resent one at a time. Any event
+the server still refuses is moved to sync_rejected.jsonl, so the rest of the
+spool keeps flowing.
+
+    python -m modules.database.sync            # print spool depth and sync lag
+    python -m modules.database.sync --drain    # ship everything spooled now
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from modules.database.connection import DB_FOLDER, close_thread_connections, get_connection, transaction
+
+SYNC_TARGET = os.environ.get("TLX_SYNC_SERVER", "")
+DEAD_LETTER_PATH = os.path.join(DB_FOLDER, "sync_rejected.jsonl")
+
+
+def sync_enabled():
+    return bool(SYNC_TARGET)
+
+
+def spool_events(conn, events):
+    """ Queue (kind, payload) events for upload; call inside the transaction that writes them locally """
+    now = time.time()
+    conn.executemany(
+        "INSERT INTO sync_spool (kind, payload, created_at) VALUES (?, ?, ?)",
+        [(kind, json.dumps(payload), now) for kind, payload in events]
+    )
+
+
+def parse_target(target):
+    if target.startswith("unix:"):
+        return {"unix_path": target[len("unix:"):]}
+    host, _, port = target.rpartition(":")
+    return {"host": host or "127.0.0.1", "port": int(port)}
+
+
+class SyncWorker:
+    def __init__(self, target=None, db_path=None, batch_size=500,
+                 min_backoff=1.0, max_backoff=60.0, idle_wait=2.0, dead_letter_path=DEAD_LETTER_PATH):
+        self.target = target or SYNC_TARGET
+        self.db_path = db_path
+        self.dead_letter_path = dead_letter_path
+        self.batch_size = batch_size
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        # How often an idle worker looks at the spool again
+        self.idle_wait = idle_wait
+
+        self.client = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.thread = None
+        self.stats = {
+            "sent": 0, "batches": 0, "failures": 0, "duplicates": 0, "rejected": 0,
+            "bytes_raw": 0, "bytes_sent": 0, "last_success": None, "last_error": None,
+        }
+
+    # -- spool ---------------------------------------------------------------
+
+    def seat_state(self):
+        return get_connection(self.db_path).execute(
+            "SELECT seat_id, acked_seq FROM sync_state WHERE id = 1"
+        ).fetchone()
+
+    def next_batch(self, acked_seq):
+        return get_connection(self.db_path).execute(
+            "SELECT seq, kind, payload FROM sync_spool WHERE seq > ? ORDER BY seq LIMIT ?",
+            (acked_seq, self.batch_size)
+        ).fetchall()
+
+    def acknowledge(self, seq):
+        with transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM sync_spool WHERE seq <= ?", (seq,))
+            conn.execute("UPDATE sync_state SET acked_seq = MAX(acked_seq, ?) WHERE id = 1", (seq,))
+
+    def metrics(self):
+        """ Spool depth (events not yet acknowledged) and sync lag (age of the oldest one, seconds) """
+        depth, oldest = get_connection(self.db_path).execute(
+            "SELECT COUNT(*), MIN(created_at) FROM sync_spool"
+        ).fetchone()
+        return dict(
+            self.stats,
+            spool_depth=depth,
+            sync_lag=time.time() - oldest if oldest is not None else 0.0,
+            compression=self.stats["bytes_raw"] / max(self.stats["bytes_sent"], 1),
+        )
+
+    # -- upload --------------------------------------------------------------
+
+    def send_batch(self, seat_id, rows):
+        from modules.database.ingest_server import IngestClient
+
+        raw = json.dumps([[seq, kind, json.loads(payload)] for seq, kind, payload in rows]).encode()
+        compressed = zlib.compress(raw, 6)
+        if self.client is None:
+            self.client = IngestClient(**parse_target(self.target))
+        reply = self.client.call({"op": "sync", "seat_id": seat_id}, compressed)
+
+        self.stats["bytes_raw"] += len(raw)
+        self.stats["bytes_sent"] += len(compressed)
+        self.stats["duplicates"] += reply.get("duplicates", 0)
+        return reply["acked"]
+
+    def sync_once(self):
+        """ Ship one batch; returns the number of events acknowledged """
+        from modules.database.ingest_server import IngestError
+
+        seat_id, acked_seq = self.seat_state()
+        rows = self.next_batch(acked_seq)
+        if not rows:
+            return 0
+        try:
+            acked = self.send_batch(seat_id, rows)
+        except IngestError as e:
+            print(f"❌ Sync server refused a batch of {len(rows)} events, sending them one by one: {e}")
+            self.send_one_by_one(seat_id, rows)
+            acked = rows[-1][0]
+        self.acknowledge(acked)
+        self.stats["sent"] += len(rows)
+        self.stats["batches"] += 1
+        self.stats["last_success"] = time.time()
+        return len(rows)
+
+    def send_one_by_one(self, seat_id, rows):
+        """ Isolate the events the server refuses; transport errors still propagate """
+        from modules.database.ingest_server import IngestError
+
+        for row in rows:
+            try:
+                self.send_batch(seat_id, [row])
+            except IngestError as e:
+                self.dead_letter(seat_id, row, str(e))
+            self.acknowledge(row[0])
+
+    def dead_letter(self, seat_id, row, error):
+        seq, kind, payload = row
+        self.stats["rejected"] += 1
+        print(f"❌ Sync server rejected {kind} event {seq}: {error}")
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "seat_id": seat_id, "seq": seq, "kind": kind, "payload": json.loads(payload), "error": error,
+            }) + "\n")
+
+    def wake(self):
+        """ New events were spooled; don't wait for the idle poll """
+        self.wake_event.set()
+
+    # -- background thread ---------------------------------------------------
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="db-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=10.0):
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run(self):
+        backoff = self.min_backoff
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    shipped = self.sync_once()
+                    backoff = self.min_backoff
+                except Exception as e:
+                    # Server down, slow or refusing: keep everything spooled and retry later
+                    self.stats["failures"] += 1
+                    self.stats["last_error"] = str(e)
+                    if self.client is not None:
+                        self.client.close()
+                        self.client = None
+                    print(f"❌ Sync to {self.target} failed, retrying in {backoff:.0f}s: {e}")
+                    self.stop_event.wait(backoff * random.uniform(0.8, 1.2))
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+
+                if shipped < self.batch_size:
+                    self.wake_event.wait(self.idle_wait)
+                    self.wake_event.clear()
+        finally:
+            if self.client is not None:
+                self.client.close()
+            close_thread_connections()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default=SYNC_TARGET, help="server (default: $TLX_SYNC_SERVER)")
+    parser.add_argument("--drain", action="store_true", help="upload the whole spool, then exit")
+    args = parser.parse_args(argv)
+
+    worker = SyncWorker(args.target)
+    if args.drain:
+        if not args.target:
+            parser.error("no sync server given")
+        while worker.sync_once():
+            pass
+    for name, value in worker.metrics().items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# Write-behind queue: callers (mostly on the GUI thread) hand over an event and
+# return immediately; a background thread writes events in batched
+# transactions. Every event is appended to a local journal first, so events
+# that were accepted but not yet committed survive a crash and are replayed on
+# the next start.
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from modules.database.connection import DB_FOLDER, close_thread_connections, get_connection, transaction
+from modules.database.events import EVENT_STATEMENTS, bind_event_rows, event_params, make_event
+from modules.database.sync import spool_events, sync_enabled
+
+JOURNAL_PATH = os.path.join(DB_FOLDER, "pending_writes.jsonl")
+
+
+class WriteBehindQueue:
+    def __init__(self, db_path=None, journal_path=JOURNAL_PATH, maxsize=10000,
+                 batch_size=500, batch_delay=0.25, fsync=False, spool=None, failed_path=None):
+        self.db_path = db_path
+        self.journal_path = journal_path
+        # Events the database refused outright (e.g. schema mismatch) are parked here instead of dropped
+        self.failed_path = failed_path or os.path.join(os.path.dirname(journal_path), "failed_writes.jsonl")
+        self.batch_size = batch_size
+        # How long the writer waits for more events before committing a batch
+        self.batch_delay = batch_delay
+        # fsync each journal line (survives power loss, costs a disk flush per event)
+        self.fsync = fsync
+        # Also queue every written event for the central server (see sync.py)
+        self.spool = sync_enabled() if spool is None else spool
+
+        # Bounded: if the disk is far behind, producers wait instead of using unbounded memory
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.journal_lock = threading.Lock()
+        self.journal = None
+        self.next_seq = 1
+        self.uncommitted = 0
+        self.listeners = []
+        self.thread = None
+        self.stopping = threading.Event()
+
+    # -- producer side ------------------------------------------------------
+
+    def submit(self, kind, **payload):
+        kind, payload = make_event(kind, **payload)
+        with self.journal_lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            self.journal.write(json.dumps({"seq": seq, "kind": kind, "payload": payload}) + "\n")
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.uncommitted += 1
+        if not self.writer_alive():
+            # Nothing would ever take it off the queue; the journal replays it on the next start
+            print(f"❌ Database writer is not running; {kind} event kept in {self.journal_path}")
+            return seq
+        self.queue.put((seq, kind, payload))
+        return seq
+
+    def flush(self, timeout=None):
+        """ Block until everything submitted so far is committed; False on timeout or a dead writer """
+        if self.thread is None:
+            return True
+        if not self.writer_alive():
+            return False
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(0.5):
+            if not self.writer_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return False
+        return True
+
+    def writer_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def add_listener(self, callback):
+        """ callback(kinds) runs on the writer thread after each committed batch """
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self):
+        last_committed = self.last_committed_seq()
+        pending = self.read_journal(last_committed)
+
+        self.journal = open(self.journal_path, "a", encoding="utf-8")
+        self.next_seq = max([last_committed] + [seq for seq, _, _ in pending]) + 1
+        self.uncommitted = len(pending)
+
+        self.thread = threading.Thread(target=self.run, name="db-writer", daemon=True)
+        self.thread.start()
+
+        if pending:
+            print(f"Replaying {len(pending)} journalled database writes.")
+        for item in pending:
+            self.queue.put(item)
+
+    def close(self, timeout=10.0):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.queue.put(("stop", None))
+        self.thread.join(timeout)
+        self.thread = None
+        self.journal.close()
+
+    # -- writer thread ------------------------------------------------------
+
+    def run(self):
+        try:
+            while True:
+                batch, control = self.next_batch()
+                if batch and not self.write_with_retry(batch):
+                    return  # shutting down before the batch got in; it stays journalled
+                for kind, arg in control:
+                    if kind == "flush":
+                        arg.set()
+                    elif kind == "stop":
+                        return
+        finally:
+            close_thread_connections()
+
+    def next_batch(self):
+        batch = []
+        control = []
+        item = self.queue.get()
+        while True:
+            if item[0] in ("flush", "stop"):
+                control.append(item)
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            try:
+                item = self.queue.get(timeout=self.batch_delay)
+            except queue.Empty:
+                break
+        return batch, control
+
+    def write_with_retry(self, batch):
+        # Whatever goes wrong, the writer thread must survive: the batch stays in
+        # the journal and is tried again (or replayed on the next start).
+        # False when the queue is closing before the batch could be written.
+        delay = 1.0
+        while True:
+            try:
+                return self.write_batch(batch)
+            except Exception as e:
+                print(f"❌ Writing {len(batch)} events failed, retrying in {delay:.0f}s: {e}")
+                if self.stopping.wait(delay):
+                    return False
+                delay = min(delay * 2, 30.0)
+
+    def write_batch(self, batch):
+        by_kind = defaultdict(list)
+        for seq, kind, payload in batch:
+            by_kind[kind].append(event_params(kind, payload))
+
+        while True:
+            try:
+                for kind, payloads in by_kind.items():
+                    bind_event_rows(kind, payloads, self.db_path)
+                with transaction(self.db_path) as conn:
+                    for kind, payloads in by_kind.items():
+                        conn.executemany(EVENT_STATEMENTS[kind], payloads)
+                    if self.spool:
+                        spool_events(conn, [(kind, payload) for _, kind, payload in batch])
+                    self.mark_committed(conn, batch[-1][0])
+                break
+            except sqlite3.OperationalError as e:
+                if "locked" in str(e) or "busy" in str(e):
+                    print(f"❌ Database busy, retrying batch: {e}")
+                    if self.stopping.wait(1.0):
+                        return False
+                    continue
+                self.write_one_by_one(batch)
+                break
+            except sqlite3.Error:
+                self.write_one_by_one(batch)
+                break
+
+        with self.journal_lock:
+            self.uncommitted -= len(batch)
+            if self.uncommitted == 0:
+                # Everything in the journal is in the database now
+                self.journal.truncate(0)
+
+        for callback in list(self.listeners):
+            try:
+                callback(set(by_kind))
+            except Exception as e:
+                print(f"❌ Write listener failed: {e}")
+        return True
+
+    def write_one_by_one(self, batch):
+        """ Isolate the events the database rejects so the rest still get written """
+        with transaction(self.db_path) as conn:
+            for seq, kind, payload in batch:
+                try:
+                    conn.execute("SAVEPOINT event")
+                    params = bind_event_rows(kind, [event_params(kind, payload)], self.db_path)[0]
+                    conn.execute(EVENT_STATEMENTS[kind], params)
+                    if self.spool:
+                        spool_events(conn, [(kind, payload)])
+                    conn.execute("RELEASE event")
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO event")
+                    conn.execute("RELEASE event")
+                    print(f"❌ Database rejected {kind} event: {e}")
+                    with open(self.failed_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"seq": seq, "kind": kind, "payload": payload, "error": str(e)}) + "\n")
+            self.mark_committed(conn, batch[-1][0])
+
+    def mark_committed(self, conn, seq):
+        # Same transaction as the inserts, so a replay never writes an event twice
+        conn.execute("INSERT OR REPLACE INTO write_journal_state (id, last_seq) VALUES (1, ?)", (seq,))
+
+    # -- journal ------------------------------------------------------------
+
+    def last_committed_seq(self):
+        row = get_connection(self.db_path).execute(
+            "SELECT last_seq FROM write_journal_state WHERE id = 1"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def read_journal(self, last_committed):
+        pending = []
+        if not os.path.exists(self.journal_path):
+            return pending
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash mid-write
+                if entry["seq"] > last_committed:
+                    pending.append((entry["seq"], entry["kind"], entry["payload"]))
+        return pending
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue()
+            _queue.start()
+        return _queue
+
+
+def flush_writes(timeout=None):
+    if _queue is not None:
+        return _queue.flush(timeout)
+    return True
+
+
+def shutdown_writes():
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.close()
+            _queue = None
+
+
+atexit.register(shutdown_writes)
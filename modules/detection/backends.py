@@ -0,0 +1,191 @@
+import threading
+import time
+import cv2
+import numpy as np
+from modules.detection.config import resolve_path
+from modules.detection.postprocess import postprocess_detections
+from modules.detection.registry import model_buffer
+from modules.detection.roi import to_frame_coordinates
+
+CLASSES_PATH = "assets/yolo/coco.names"
+
+
+class Detector:
+    """ Base class for person detectors: subclasses only say how to build the network """
+
+    name = None
+    # Published COCO mAP@0.5 and GFLOPs at 416x416, used to report the tradeoff
+    coco_map = None
+    gflops_416 = None
+
+    def __init__(self, input_size=416, conf_threshold=0.5, nms_threshold=0.4, **options):
+        if input_size % 32:
+            raise ValueError(f"input_size must be a multiple of 32, got {input_size}")
+        self.input_size = input_size
+        self.conf_threshold = conf_threshold
+        self.nms_threshold = nms_threshold
+        self.options = options
+
+        self.net = self.load_net()
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.output_layers = self.net.getUnconnectedOutLayersNames()
+
+        with open(resolve_path(CLASSES_PATH), "r") as f:
+            self.classes = [line.strip() for line in f.readlines()]
+        self.person_class_id = self.classes.index("person")
+
+        self.inference_time = None
+        # One network can only run one forward pass at a time
+        self.lock = threading.Lock()
+
+    def load_net(self):
+        raise NotImplementedError
+
+    def forward(self, images):
+        blob = cv2.dnn.blobFromImages(
+            images, 1/255.0, (self.input_size, self.input_size), swapRB=True, crop=False
+        )
+        self.net.setInput(blob)
+        return self.net.forward(self.output_layers)
+
+    def decode(self, outputs):
+        """ Bring raw outputs to Darknet layout: normalised cx, cy, w, h, objectness, class scores """
+        return outputs
+
+    def detect(self, frame, roi=None):
+        return self.detect_batch([frame], [roi])[0]
+
+    def detect_batch(self, frames, rois=None):
+        """ Person boxes for several frames from a single forward pass """
+        images = []
+        offsets = []
+        for frame, roi in zip(frames, rois or [None] * len(frames)):
+            offset = None
+            if roi is not None:
+                frame, offset = roi.crop(frame)
+            images.append(frame)
+            offsets.append(offset)
+
+        with self.lock:
+            started = time.perf_counter()
+            outputs = self.forward(images)
+            elapsed = time.perf_counter() - started
+        self.inference_time = elapsed if self.inference_time is None else 0.8 * self.inference_time + 0.2 * elapsed
+
+        results = []
+        for index, (image, offset) in enumerate(zip(images, offsets)):
+            height, width = image.shape[:2]
+            image_outputs = self.decode([batch_item(output, index, len(images)) for output in outputs])
+            boxes = postprocess_detections(
+                image_outputs, width, height, class_id=self.person_class_id,
+                conf_threshold=self.conf_threshold, nms_threshold=self.nms_threshold
+            )
+            if offset is not None:
+                boxes = to_frame_coordinates(boxes, offset)
+            results.append(boxes)
+        return results
+
+    def clone(self):
+        """ Independent network for another thread (see acquire_detector); weights come from the in-memory cache """
+        return type(self)(
+            input_size=self.input_size, conf_threshold=self.conf_threshold,
+            nms_threshold=self.nms_threshold, **self.options
+        )
+
+    def describe(self):
+        """ Accuracy/latency tradeoff of this backend at its configured input size """
+        gflops = None
+        if self.gflops_416 is not None:
+            gflops = round(self.gflops_416 * (self.input_size / 416) ** 2, 2)
+        return {
+            "backend": self.name,
+            "input_size": self.input_size,
+            "coco_map50": self.coco_map,
+            "gflops": gflops,
+            "measured_ms": None if self.inference_time is None else round(self.inference_time * 1000, 1),
+        }
+
+
+def batch_item(output, index, batch_size):
+    """ Rows belonging to one image of a batched forward pass """
+    if output.ndim == 3:
+        return output[index:index + 1]
+    # Darknet region layers stack the whole batch into one 2-D array
+    rows = output.shape[0] // batch_size
+    return output[index * rows:(index + 1) * rows]
+
+
+class YoloV3Detector(Detector):
+    name = "yolov3"
+    coco_map = 55.3
+    gflops_416 = 65.86
+    cfg_path = "assets/yolo/yolov3.cfg"
+    weights_path = "assets/yolo/yolov3.weights"
+
+    def load_net(self):
+        return cv2.dnn.readNetFromDarknet(
+            model_buffer(resolve_path(self.cfg_path)), model_buffer(resolve_path(self.weights_path))
+        )
+
+
+class YoloV3TinyDetector(YoloV3Detector):
+    # Roughly a tenth of the compute of full YOLOv3; misses small/occluded people more often
+    name = "yolov3-tiny"
+    coco_map = 33.1
+    gflops_416 = 5.56
+    cfg_path = "assets/yolo/yolov3-tiny.cfg"
+    weights_path = "assets/yolo/yolov3-tiny.weights"
+
+
+class OnnxDetector(Detector):
+    """ YOLOv5/YOLOv8 style exports loaded through cv2.dnn.readNetFromONNX """
+
+    name = "onnx"
+
+    def load_net(self):
+        return cv2.dnn.readNetFromONNX(model_buffer(resolve_path(self.options["onnx_model"])))
+
+    def decode(self, outputs):
+        decoded = []
+        for output in outputs:
+            rows = np.asarray(output)
+            if rows.ndim == 3:
+                rows = rows[0]
+            if rows.shape[0] < rows.shape[1]:
+                # YOLOv8 layout: (4 + classes, anchors) and no objectness column
+                rows = rows.T
+                rows = np.hstack([rows[:, :4], np.ones((len(rows), 1), rows.dtype), rows[:, 4:]])
+            else:
+                rows = rows.copy()
+                rows[:, 5:] *= rows[:, 4:5]
+            # Exported models report boxes in input pixels, Darknet in fractions
+            rows[:, :4] /= self.input_size
+            decoded.append(rows)
+        return decoded
+
+
+BACKENDS = {
+    YoloV3Detector.name: YoloV3Detector,
+    YoloV3TinyDetector.name: YoloV3TinyDetector,
+    OnnxDetector.name: OnnxDetector,
+}
+
+
+def create_detector(config):
+    if config["backend"] == "remote":
+        # Frames go to a shared batching server instead of a local network
+        from modules.detection.server import RemoteDetector
+        return RemoteDetector(config["server"]["host"], config["server"]["port"])
+
+    try:
+        backend = BACKENDS[config["backend"]]
+    except KeyError:
+        raise ValueError(f"Unknown detector backend {config['backend']!r}, expected one of {sorted(BACKENDS) + ['remote']}")
+
+    return backend(
+        input_size=config["input_size"],
+        conf_threshold=config["conf_threshold"],
+        nms_threshold=config["nms_threshold"],
+        onnx_model=config["onnx_model"],
+    )
@@ -0,0 +1,170 @@
+"""
+Headless replay benchmark for the camera detection pipeline (no Qt, no webcam).
+
+    python -m modules.detection.benchmark --source video:recordings/desk.mp4
+    python -m modules.detection.benchmark --source synthetic:900 --backend yolov3-tiny --input-size 320 --realtime
+
+By default every frame is pushed through as fast as possible. With --realtime the
+source is paced at its frame rate and inference runs on its own thread behind a
+latest-frame buffer, exactly like CameraThread, so dropped frames and queueing
+show up in the latency numbers.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import numpy as np
+from modules.detection.config import load_config
+from modules.detection.frame_buffer import LatestFrameBuffer
+from modules.detection.pipeline import DetectionPipeline
+from modules.detection.registry import get_detector
+from modules.detection.sources import FramePacer, open_source
+
+
+class BenchmarkRecorder:
+    def __init__(self):
+        self.latencies = []
+        self.inference_times = []
+        self.alerts = []
+        self.frames_read = 0
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+
+    def record(self, result, captured_at, decided_at, clip_time):
+        self.latencies.append(decided_at - captured_at)
+        if result.detected:
+            self.inference_times.append(result.inference_time)
+        if result.alert:
+            self.alerts.append(round(clip_time, 2))
+
+    def report(self, pipeline):
+        wall = time.perf_counter() - self.started
+        cpu = time.process_time() - self.cpu_started
+        processed = len(self.latencies)
+        latencies_ms = np.array(self.latencies or [0.0]) * 1000
+        inference_total = sum(self.inference_times)
+
+        report = {
+            "detector": pipeline.detector.describe(),
+            "frames_read": self.frames_read,
+            "frames_processed": processed,
+            "frames_dropped": self.frames_read - processed,
+            "wall_seconds": round(wall, 2),
+            "pipeline_fps": round(processed / wall, 1) if wall else None,
+            "detector_passes": len(self.inference_times),
+            "inference_fps": round(len(self.inference_times) / inference_total, 2) if inference_total else None,
+            "latency_ms": {
+                "p50": round(float(np.percentile(latencies_ms, 50)), 2),
+                "p90": round(float(np.percentile(latencies_ms, 90)), 2),
+                "p99": round(float(np.percentile(latencies_ms, 99)), 2),
+                "max": round(float(latencies_ms.max()), 2),
+            },
+            "cpu_ms_per_frame": round(cpu * 1000 / processed, 2) if processed else None,
+            "alerts_at_seconds": self.alerts,
+        }
+        if pipeline.motion_gate:
+            report["motion_gate"] = dict(pipeline.motion_gate.stats)
+        return report
+
+
+def run_offline(source, pipeline, max_frames=None):
+    recorder = BenchmarkRecorder()
+    while max_frames is None or recorder.frames_read < max_frames:
+        ok, frame = source.read()
+        captured_at = time.perf_counter()
+        if not ok:
+            break
+        # Timers inside the pipeline run on the clip's own clock
+        clip_time = recorder.frames_read / source.fps
+        recorder.frames_read += 1
+
+        pipeline.observe_capture(clip_time)
+        result = pipeline.process(frame, clip_time)
+        recorder.record(result, captured_at, time.perf_counter(), clip_time)
+    return recorder
+
+
+def run_realtime(source, pipeline, max_frames=None):
+    recorder = BenchmarkRecorder()
+    buffer = LatestFrameBuffer()
+    first_capture = []
+
+    def capture():
+        pacer = FramePacer(source.fps)
+        while max_frames is None or recorder.frames_read < max_frames:
+            if not source.live:
+                pacer.wait()
+            ok, frame = source.read()
+            if not ok:
+                break
+            recorder.frames_read += 1
+            captured_at = time.perf_counter()
+            pipeline.observe_capture(captured_at)  # only the gaps between captures matter
+            buffer.put((frame, captured_at))
+        buffer.close()
+
+    capture_thread = threading.Thread(target=capture, daemon=True)
+    capture_thread.start()
+
+    while True:
+        item = buffer.get()
+        if item is None:
+            break
+        frame, captured_at = item
+        if not first_capture:
+            first_capture.append(captured_at)
+        clip_time = captured_at - first_capture[0]
+
+        result = pipeline.process(frame, clip_time)
+        recorder.record(result, captured_at, time.perf_counter(), clip_time)
+
+    capture_thread.join()
+    return recorder
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="synthetic", help="camera[:i], video:<path>, images:<dir> or synthetic[:frames]")
+    parser.add_argument("--config", help="detection config file (defaults to assets/detection.json)")
+    parser.add_argument("--backend", help="override the configured backend")
+    parser.add_argument("--input-size", type=int, help="override the configured input size")
+    parser.add_argument("--max-frames", type=int)
+    parser.add_argument("--realtime", action="store_true", help="pace the source and decouple inference like the app")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--fail-above-p90", type=float, metavar="MS",
+                        help="exit with status 1 when p90 capture->decision latency exceeds MS")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if args.backend:
+        config["backend"] = args.backend
+    if args.input_size:
+        config["input_size"] = args.input_size
+
+    source = open_source(args.source)
+    if not source.is_opened():
+        print(f"❌ Error: Unable to open source {args.source}")
+        return 2
+
+    pipeline = DetectionPipeline(config, get_detector(config))
+    run = run_realtime if args.realtime else run_offline
+    try:
+        report = run(source, pipeline, args.max_frames).report(pipeline)
+    finally:
+        source.release()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
+
+    if args.fail_above_p90 is not None and report["latency_ms"]["p90"] > args.fail_above_p90:
+        print(f"❌ p90 latency {report['latency_ms']['p90']} ms is above {args.fail_above_p90} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
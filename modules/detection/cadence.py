@@ -0,0 +1,73 @@
+import math
+import cv2
+
+
+class DetectionCadence:
+    """ Decides on which frames the detector runs; the tracker covers the rest """
+
+    def __init__(self, interval=5, adaptive=True, min_interval=1, max_interval=30,
+                 inference_budget=0.5, scene_change_threshold=12.0, max_frame_gap=0.5):
+        self.interval = interval
+        self.adaptive = adaptive
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Fraction of the wall clock the detector is allowed to use
+        self.inference_budget = inference_budget
+        # Mean absolute grey level difference (0-255) that counts as a new scene
+        self.scene_change_threshold = scene_change_threshold
+        # Longest gap between two captures that still counts as one frame period
+        self.max_frame_gap = max_frame_gap
+
+        self.frames_since_detection = None
+        self.inference_time = None
+        self.frame_period = None
+        self.last_frame_time = None
+        self.reference = None
+
+    def should_detect(self, frame, now, force=False):
+        thumbnail = self._thumbnail(frame)
+
+        due = (
+            force
+            or self.frames_since_detection is None
+            or self.frames_since_detection + 1 >= self.interval
+            or self._scene_changed(thumbnail)
+        )
+        if due:
+            self.frames_since_detection = 0
+            self.reference = thumbnail
+        else:
+            self.frames_since_detection += 1
+        return due
+
+    def record_inference(self, seconds):
+        self.inference_time = _ema(self.inference_time, seconds)
+        if self.adaptive and self.frame_period:
+            # Spread one inference over enough frames to stay inside the budget
+            frames = math.ceil(self.inference_time / (self.frame_period * self.inference_budget))
+            self.interval = min(self.max_interval, max(self.min_interval, frames))
+
+    def observe_frame(self, now):
+        """ Call for every captured frame, including those that never reach should_detect """
+        if self.last_frame_time is not None and now > self.last_frame_time:
+            # A stalled camera or a paused clip is not the frame period
+            limit = self.max_frame_gap if self.frame_period is None else min(self.max_frame_gap, 4 * self.frame_period)
+            self.frame_period = _ema(self.frame_period, min(now - self.last_frame_time, limit))
+        self.last_frame_time = now
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, (32, 24), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def _scene_changed(self, thumbnail):
+        if self.reference is None or self.scene_change_threshold is None:
+            return False
+        return bool(cv2.absdiff(thumbnail, self.reference).mean() > self.scene_change_threshold)
+
+
+def _ema(previous, value, alpha=0.2):
+    if previous is None:
+        return value
+    return previous + alpha * (value - previous)
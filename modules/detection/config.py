@@ -0,0 +1,68 @@
+import json
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "assets", "detection.json")
+
+# Anything missing from assets/detection.json falls back to these
+DEFAULT_CONFIG = {
+    "source": "camera:0",         # camera[:index] | video:<path> | images:<dir> | synthetic
+    "preview": True,              # False: detect only, never draw the camera image
+    "detection_process": False,   # True: run the detector in a separate process
+    "backend": "yolov3",          # yolov3 | yolov3-tiny | onnx | remote
+    "input_size": 416,            # multiple of 32, e.g. 320 or 416
+    "conf_threshold": 0.5,
+    "nms_threshold": 0.4,
+    "onnx_model": "assets/yolo/yolov5s.onnx",
+    "detect_interval": 5,
+    "adaptive_cadence": True,
+    # Only run the detector on the "behind the user" zone (fractions of the
+    # frame), padded by margin; boxes are mapped back to full-frame pixels
+    "roi": {
+        "enabled": False,
+        "zone": [0.333, 0.0, 0.667, 0.5],
+        "margin": 0.1,
+    },
+    # Shared batching detection server (backend "remote" on the seats)
+    "server": {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "backend": "yolov3",
+        "max_batch": 8,
+        "tick_ms": 20,
+    },
+    # Skip YOLO while the scene is static; changed_area is the fraction of
+    # pixels that must differ, max_staleness forces a pass every N seconds
+    "motion_gate": {
+        "enabled": True,
+        "changed_area": 0.01,
+        "pixel_threshold": 25,
+        "max_staleness": 5.0,
+    },
+}
+
+
+def load_config(path=None):
+    path = path or os.environ.get("TLX_DETECTION_CONFIG", CONFIG_PATH)
+    config = {key: dict(value) if isinstance(value, dict) else value for key, value in DEFAULT_CONFIG.items()}
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                overrides = json.load(f)
+            for key, value in overrides.items():
+                if isinstance(config.get(key), dict) and isinstance(value, dict):
+                    config[key] = {**config[key], **value}
+                else:
+                    config[key] = value
+        except (OSError, ValueError) as e:
+            print(f"❌ Ignoring unreadable detection config {path}: {e}")
+
+    return config
+
+
+def resolve_path(path):
+    """ Paths in the config are relative to the project root, not the working directory """
+    if os.path.isabs(path):
+        return path
+    return os.path.join(PROJECT_ROOT, path)
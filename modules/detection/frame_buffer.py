@@ -0,0 +1,42 @@
+import threading
+
+
+class LatestFrameBuffer:
+    """ Single-slot mailbox between pipeline stages: a new frame replaces an unread one """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._taken_seq = 0
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """ Store item; returns the unread item it replaced (or None) so its owner can recycle it """
+        with self._cond:
+            replaced = None
+            if self._seq != self._taken_seq:
+                self.dropped += 1  # reader never saw the previous one
+                replaced = self._item
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+            return replaced
+
+    def get(self, timeout=None):
+        """ Wait for an item the caller has not seen yet; None on timeout or close """
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._seq != self._taken_seq, timeout)
+            if self._seq == self._taken_seq:
+                return None
+            self._taken_seq = self._seq
+            item = self._item
+            self._item = None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._item = None
+            self._cond.notify_all()
@@ -0,0 +1,70 @@
+import cv2
+
+
+class MotionGate:
+    """ Cheap frame differencing in front of the detector: static scenes skip YOLO """
+
+    def __init__(self, changed_area=0.01, pixel_threshold=25, max_staleness=5.0,
+                 size=(80, 60), learning_rate=0.05):
+        # Fraction of (downscaled) pixels that must change to count as motion
+        self.changed_area = changed_area
+        self.pixel_threshold = pixel_threshold
+        # Run the detector at least this often (seconds) even if nothing moves
+        self.max_staleness = max_staleness
+        self.size = size
+        self.learning_rate = learning_rate
+
+        self.background = None
+        self.last_inference = None
+        self.last_changed_area = 0.0
+        self.stats = {"frames": 0, "motion": 0, "stale": 0, "skipped": 0, "inferences": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        gate = config["motion_gate"]
+        return cls(
+            changed_area=gate["changed_area"], pixel_threshold=gate["pixel_threshold"],
+            max_staleness=gate["max_staleness"],
+        )
+
+    def update(self, frame, now):
+        """ "motion", "stale" or None (static scene, reuse the last result) """
+        self.stats["frames"] += 1
+        self.last_changed_area = self.measure(frame)
+
+        if self.last_changed_area >= self.changed_area:
+            reason = "motion"
+        elif self.last_inference is None or now - self.last_inference >= self.max_staleness:
+            reason = "stale"
+        else:
+            self.stats["skipped"] += 1
+            return None
+
+        self.stats[reason] += 1
+        return reason
+
+    def record_inference(self, now):
+        self.last_inference = now
+        self.stats["inferences"] += 1
+
+    def measure(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+
+        if self.background is None:
+            self.background = small.astype("float32")
+            return 1.0
+
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+        # Slowly fold the scene into the background so lighting drift is ignored
+        cv2.accumulateWeighted(small, self.background, self.learning_rate)
+        return float((diff > self.pixel_threshold).mean())
+
+    def summary(self):
+        frames = self.stats["frames"] or 1
+        return (
+            f"Motion gate: {self.stats['inferences']} inferences, {self.stats['skipped']} skipped "
+            f"of {self.stats['frames']} frames ({100 * self.stats['skipped'] / frames:.0f}% static)"
+        )
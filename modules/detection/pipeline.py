@@ -0,0 +1,75 @@
+# Qt-free part of the camera pipeline: everything between "a frame was
+# captured" and "raise the second-person alert". CameraThread and the offline
+# benchmark both drive it one frame at a time.
+import time
+from modules.detection.cadence import DetectionCadence
+from modules.detection.motion import MotionGate
+from modules.detection.roi import Roi
+from modules.detection.tracker import BoxTracker
+
+SECOND_PERSON_SECONDS = 10
+
+
+class DetectionResult:
+    def __init__(self, boxes, detected, inference_time, alert):
+        self.boxes = boxes
+        self.person_count = len(boxes)
+        self.detected = detected            # the detector ran on this frame
+        self.inference_time = inference_time
+        self.alert = alert                  # SECOND_PERSON_PRESENT should fire
+
+
+class DetectionPipeline:
+    def __init__(self, config, detector):
+        self.config = config
+        self.detector = detector
+        self.second_person_start_time = None
+
+        # Run YOLO every few frames (or on a scene change) and track in between
+        self.cadence = DetectionCadence(
+            interval=config["detect_interval"], adaptive=config["adaptive_cadence"]
+        )
+        self.tracker = BoxTracker()
+
+        # Static scenes reuse the last result instead of running YOLO
+        self.motion_gate = MotionGate.from_config(config) if config["motion_gate"]["enabled"] else None
+
+        # Optionally spend the detector's pixels on the watched zone only
+        self.roi = Roi.from_config(config) if config["roi"]["enabled"] else None
+
+    def observe_capture(self, captured_at):
+        """ Every frame the source delivers, including the ones replaced before process() sees them """
+        self.cadence.observe_frame(captured_at)
+
+    def process(self, frame, captured_at):
+        detected = False
+        inference_time = 0.0
+
+        reason = self.motion_gate.update(frame, captured_at) if self.motion_gate else "motion"
+        if reason is None:
+            pass  # nothing moved: keep the last boxes and person count
+        elif self.cadence.should_detect(frame, captured_at, force=reason == "stale"):
+            started = time.perf_counter()
+            boxes = self.detector.detect(frame, roi=self.roi)
+            inference_time = time.perf_counter() - started
+            self.cadence.record_inference(inference_time)
+            if self.motion_gate:
+                self.motion_gate.record_inference(captured_at)
+            self.tracker.update(boxes)
+            detected = True
+        else:
+            self.tracker.predict()
+
+        alert = self.update_second_person_timer(self.tracker.count, captured_at)
+        return DetectionResult(self.tracker.boxes, detected, inference_time, alert)
+
+    def update_second_person_timer(self, person_count, current_time):
+        if person_count >= 2:
+            if self.second_person_start_time is None:
+                self.second_person_start_time = current_time
+            elif current_time - self.second_person_start_time >= SECOND_PERSON_SECONDS:
+                self.second_person_start_time = None
+                return True
+        else:
+            self.second_person_start_time = None
+        return False
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+
+PERSON_CLASS_ID = 0  # index of "person" in assets/yolo/coco.names
+
+
+def postprocess_detections(outputs, frame_width, frame_height, class_id=PERSON_CLASS_ID,
+                           conf_threshold=0.5, nms_threshold=0.4):
+    """ Turn raw YOLO output layers into deduplicated (x, y, w, h, confidence) boxes """
+    # Cheap column filter first so nothing else touches the ~10k background rows
+    candidates = []
+    for output in outputs:
+        output = np.asarray(output)
+        output = output.reshape(-1, output.shape[-1])
+        candidates.append(output[output[:, 5 + class_id] > conf_threshold])
+    if not candidates:
+        return []  # e.g. a backend that returned no layers
+    rows = np.concatenate(candidates)
+    if not len(rows):
+        return []
+    scores = rows[:, 5:]
+
+    # Keep the old rule: the wanted class must also be the best class of the row
+    best = scores.argmax(axis=1) == class_id
+    rows = rows[best]
+    confidences = scores[best, class_id]
+    if not len(rows):
+        return []
+
+    scale = np.array([frame_width, frame_height], dtype=np.float32)
+    sizes = rows[:, 2:4] * scale
+    corners = rows[:, 0:2] * scale - sizes / 2
+    boxes = np.hstack([corners, sizes]).astype(np.int32)
+
+    keep = cv2.dnn.NMSBoxes(boxes.tolist(), confidences.tolist(), conf_threshold, nms_threshold)
+    return [
+        (int(boxes[i, 0]), int(boxes[i, 1]), int(boxes[i, 2]), int(boxes[i, 3]), float(confidences[i]))
+        for i in np.asarray(keep, dtype=np.int64).reshape(-1)
+    ]
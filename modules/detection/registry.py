@@ -0,0 +1,73 @@
+# Process-wide cache of detector models. Weights are read from disk once and
+# built networks are reused, so logging out and back in does not reload YOLO.
+# Threads that run inference on their own (CameraThread) acquire a network
+# nobody else holds, cloned from the cached bytes when all are taken, instead
+# of queueing on one network's lock.
+import atexit
+import threading
+import numpy as np
+
+_lock = threading.RLock()
+_buffers = {}
+_detectors = {}
+_idle = {}  # config key -> networks acquired before and released since
+
+
+def model_buffer(path):
+    """ Raw bytes of a model file, read once per process """
+    with _lock:
+        if path not in _buffers:
+            _buffers[path] = np.fromfile(path, dtype=np.uint8)
+        return _buffers[path]
+
+
+def detector_key(config):
+    return (
+        config["backend"], config["input_size"], config["conf_threshold"],
+        config["nms_threshold"], config["onnx_model"],
+        config["server"]["host"], config["server"]["port"],
+    )
+
+
+def get_detector(config):
+    """ Shared, ready-to-use detector for this config; built on first use """
+    from modules.detection.backends import create_detector
+
+    key = detector_key(config)
+    with _lock:
+        if key not in _detectors:
+            _detectors[key] = create_detector(config)
+        return _detectors[key]
+
+
+def acquire_detector(config):
+    """ Detector for one thread's exclusive use; hand it back with release_detector() """
+    key = detector_key(config)
+    with _lock:
+        idle = _idle.get(key)
+        if idle is None:
+            # The first taker gets the shared network
+            _idle[key] = []
+            return get_detector(config)
+        if idle:
+            return idle.pop()
+        return get_detector(config).clone()
+
+
+def release_detector(config, detector):
+    with _lock:
+        idle = _idle.get(detector_key(config))
+        if idle is not None:
+            idle.append(detector)
+        elif hasattr(detector, "close"):
+            detector.close()  # released after release_all()
+
+
+def release_all():
+    with _lock:
+        _detectors.clear()
+        _idle.clear()
+        _buffers.clear()
+
+
+atexit.register(release_all)
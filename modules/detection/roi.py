@@ -0,0 +1,41 @@
+class Roi:
+    """ Watched zone of the frame, as fractions (x0, y0, x1, y1) of width and height """
+
+    def __init__(self, zone=(1/3, 0.0, 2/3, 0.5), margin=0.1):
+        self.zone = tuple(zone)
+        self.margin = margin
+
+    @classmethod
+    def from_config(cls, config):
+        roi = config["roi"]
+        return cls(zone=roi["zone"], margin=roi["margin"])
+
+    def bounds(self, width, height, margin=0.0):
+        x0, y0, x1, y1 = self.zone
+        pad_x = margin * (x1 - x0)
+        pad_y = margin * (y1 - y0)
+        return (
+            max(0, int((x0 - pad_x) * width)),
+            max(0, int((y0 - pad_y) * height)),
+            min(width, int(round((x1 + pad_x) * width))),
+            min(height, int(round((y1 + pad_y) * height))),
+        )
+
+    def crop(self, frame):
+        """ Zone plus margin as a view of the frame, and its offset in the full frame """
+        height, width = frame.shape[:2]
+        x0, y0, x1, y1 = self.bounds(width, height, self.margin)
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def contains(self, box, width, height):
+        """ True when the centre of a full-frame box falls inside the zone (margin excluded) """
+        x, y, w, h = box[:4]
+        x0, y0, x1, y1 = self.bounds(width, height)
+        center_x = x + w // 2
+        center_y = y + h // 2
+        return x0 <= center_x <= x1 and y0 <= center_y < y1
+
+
+def to_frame_coordinates(boxes, offset):
+    offset_x, offset_y = offset
+    return [(x + offset_x, y + offset_y, w, h, conf) for (x, y, w, h, conf) in boxes]
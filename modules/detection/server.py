@@ -0,0 +1,300 @@
+"""
+Shared detection server: many CameraThread clients, one network.
+
+Frames from all connected seats are collected for one tick (or until max_batch
+frames are waiting) and go through a single cv2.dnn.blobFromImages forward
+pass; each client gets its own person boxes back over a local TCP socket.
+
+    python -m modules.detection.server --backend yolov3-tiny --port 8765
+    python -m modules.detection.server --loopback-clients 8 --frames 200
+
+Seats use it with "backend": "remote" in assets/detection.json. The
+--loopback-clients mode starts the server plus N synthetic clients in one
+process and reports the total throughput, which is enough to test it.
+"""
+import argparse
+import json
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import numpy as np
+from modules.detection.config import load_config
+from modules.detection.registry import get_detector
+from modules.detection.roi import Roi
+
+HEADER = struct.Struct("!I")
+
+
+def send_message(sock, header, payload=b""):
+    data = json.dumps(header).encode()
+    sock.sendall(HEADER.pack(len(data)) + data + payload)
+
+
+def recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    (length,) = HEADER.unpack(recv_exact(sock, HEADER.size))
+    header = json.loads(recv_exact(sock, length))
+    payload = recv_exact(sock, header.get("payload", 0))
+    return header, payload
+
+
+class PendingFrame:
+    def __init__(self, frame, roi):
+        self.frame = frame
+        self.roi = roi
+        self.boxes = None
+        self.batch_size = 0
+        self.done = threading.Event()
+
+
+class FrameBatcher:
+    """ Collects frames from all clients and runs them through the network in batches """
+
+    def __init__(self, detector, max_batch=8, tick=0.02):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.tick = tick
+        self.pending = queue.Queue()
+        self.running = True
+        self.stats = {"frames": 0, "batches": 0}
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, roi):
+        item = PendingFrame(frame, roi)
+        self.pending.put(item)
+        item.done.wait()
+        return item
+
+    def loop(self):
+        while self.running:
+            try:
+                batch = [self.pending.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.tick
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.pending.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.detector.detect_batch([p.frame for p in batch], [p.roi for p in batch])
+            except Exception as e:
+                print(f"❌ Batch inference failed: {e}")
+                results = [[] for _ in batch]
+
+            self.stats["frames"] += len(batch)
+            self.stats["batches"] += 1
+            for item, boxes in zip(batch, results):
+                item.boxes = boxes
+                item.batch_size = len(batch)
+                item.done.set()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+
+class DetectionRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            if header.get("op") == "describe":
+                send_message(self.request, {"seq": header.get("seq"), "describe": self.server.describe()})
+                continue
+
+            frame = np.frombuffer(payload, dtype=np.uint8).reshape(header["shape"])
+            roi = Roi(*header["roi"]) if header.get("roi") else None
+            item = self.server.batcher.submit(frame, roi)
+            send_message(self.request, {"seq": header["seq"], "boxes": item.boxes, "batch": item.batch_size})
+
+
+class DetectionServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, detector, host="127.0.0.1", port=8765, max_batch=8, tick=0.02):
+        self.detector = detector
+        self.batcher = FrameBatcher(detector, max_batch=max_batch, tick=tick)
+        super().__init__((host, port), DetectionRequestHandler)
+
+    def describe(self):
+        stats = self.batcher.stats
+        return dict(
+            self.detector.describe(), server=True,
+            mean_batch=round(stats["frames"] / stats["batches"], 2) if stats["batches"] else None,
+        )
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.stop()
+
+
+class RemoteDetector:
+    """ Detector interface that forwards frames to a DetectionServer """
+
+    def __init__(self, host="127.0.0.1", port=8765, timeout=10.0, min_backoff=1.0, max_backoff=60.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.sock = None
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.last_batch_size = 0
+        # While the server is down frames get no boxes instead of a reconnect each
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.backoff = min_backoff
+        self.retry_at = 0.0
+        self.available = True
+
+    def connect(self):
+        self.sock = socket.create_connection(self.address, timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def call(self, header, payload=b""):
+        with self.lock:
+            self.seq += 1
+            header = dict(header, seq=self.seq, payload=len(payload))
+            if self.sock is None and time.monotonic() < self.retry_at:
+                return None
+            try:
+                if self.sock is None:
+                    self.connect()
+                send_message(self.sock, header, payload)
+                reply, _ = recv_message(self.sock)
+            except (ConnectionError, OSError) as e:
+                if self.available:
+                    print(f"❌ Detection server unavailable, retrying with backoff: {e}")
+                    self.available = False
+                if self.sock is not None:
+                    self.sock.close()
+                self.sock = None
+                self.retry_at = time.monotonic() + self.backoff
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                return None
+            if not self.available:
+                print(f"✅ Detection server at {self.address[0]}:{self.address[1]} is back")
+                self.available = True
+            self.backoff = self.min_backoff
+            return reply
+
+    def detect(self, frame, roi=None):
+        frame = np.ascontiguousarray(frame)
+        reply = self.call(
+            {"op": "detect", "shape": frame.shape, "roi": [roi.zone, roi.margin] if roi else None},
+            frame.tobytes(),
+        )
+        if reply is None:
+            return []
+        self.last_batch_size = reply["batch"]
+        return [tuple(box) for box in reply["boxes"]]
+
+    def clone(self):
+        """ Same server over a connection of its own """
+        return type(self)(*self.address, self.timeout, self.min_backoff, self.max_backoff)
+
+    def describe(self):
+        reply = self.call({"op": "describe"})
+        return reply["describe"] if reply else {"backend": "remote", "address": self.address}
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+def run_loopback(server, clients, frames):
+    """ N synthetic seats hammering the server at once; returns total frames per second """
+    from modules.detection.sources import SyntheticSource
+
+    host, port = server.server_address
+    done = []
+
+    def client(index):
+        detector = RemoteDetector(host, port)
+        source = SyntheticSource(frames=frames, seed=index)
+        while True:
+            ok, frame = source.read()
+            if not ok:
+                break
+            detector.detect(frame)
+        detector.close()
+        done.append(frames)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return sum(done) / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", help="detection config file (defaults to assets/detection.json)")
+    parser.add_argument("--backend", help="network the server runs (defaults to server.backend)")
+    parser.add_argument("--input-size", type=int)
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--max-batch", type=int)
+    parser.add_argument("--tick-ms", type=float)
+    parser.add_argument("--loopback-clients", type=int, help="run N synthetic clients against a local server and exit")
+    parser.add_argument("--frames", type=int, default=100, help="frames per loopback client")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    server_config = config["server"]
+    config["backend"] = args.backend or server_config["backend"]
+    if args.input_size:
+        config["input_size"] = args.input_size
+
+    host = args.host or server_config["host"]
+    port = args.port if args.port is not None else server_config["port"]
+    if args.loopback_clients:
+        port = 0  # any free port
+
+    server = DetectionServer(
+        get_detector(config), host, port,
+        max_batch=args.max_batch or server_config["max_batch"],
+        tick=(args.tick_ms if args.tick_ms is not None else server_config["tick_ms"]) / 1000,
+    )
+    serve_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    serve_thread.start()
+    print(f"Detection server on {server.server_address[0]}:{server.server_address[1]} ({config['backend']})")
+
+    try:
+        if args.loopback_clients:
+            fps = run_loopback(server, args.loopback_clients, args.frames)
+            print(f"{args.loopback_clients} clients: {fps:.1f} frames/s total, {server.describe()}")
+        else:
+            serve_thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
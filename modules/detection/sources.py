@@ -0,0 +1,164 @@
+# Where frames come from: the webcam, a recorded video, a folder of images or
+# a synthetic generator. Everything past capture only sees read()/release().
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    fps = 30.0
+    live = False  # live sources pace themselves; replays can run flat out
+
+    def read(self):
+        """ (ok, frame) like cv2.VideoCapture.read(); ok is False once exhausted """
+        raise NotImplementedError
+
+    def read_into(self, out):
+        """ Like read(), but fills `out` when the frame fits so callers can reuse buffers """
+        ok, frame = self.read()
+        if ok and frame.shape == out.shape:
+            np.copyto(out, frame)
+            return True, out
+        return ok, frame
+
+    def is_opened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    live = True
+
+    def __init__(self, index=0):
+        # DirectShow opens much faster than MSMF on Windows; elsewhere let OpenCV pick
+        api = cv2.CAP_DSHOW if sys.platform == "win32" else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, api)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        return self.cap.read()
+
+    def read_into(self, out):
+        # OpenCV decodes straight into `out` when shape and type match
+        return self.cap.read(out)
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        return ok, frame
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path, fps=15.0, loop=False):
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.fps = fps
+        self.loop = loop
+        self.position = 0
+
+    def read(self):
+        if self.position >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+    def is_opened(self):
+        return bool(self.files)
+
+
+class SyntheticSource(FrameSource):
+    """ Noisy static background with a few moving blobs; no webcam or footage needed """
+
+    def __init__(self, frames=300, width=640, height=480, fps=30.0, movers=2, seed=0):
+        self.frames = frames
+        self.fps = fps
+        self.movers = movers
+        self.position = 0
+        self.rng = np.random.default_rng(seed)
+        self.background = self.rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+
+    def read(self):
+        if self.frames is not None and self.position >= self.frames:
+            return False, None
+        frame = self.background.copy()
+        height, width = frame.shape[:2]
+        t = self.position / self.fps
+        for mover in range(self.movers):
+            # Each blob walks across the frame for a few seconds, then rests
+            phase = (t / 4.0 + mover * 0.37) % 2.0
+            x = int(min(phase, 1.0) * (width - 120))
+            y = height // 4 + mover * 40
+            cv2.rectangle(frame, (x, y), (x + 100, y + 220), (30 + 80 * mover, 160, 200), -1)
+        self.position += 1
+        return True, frame
+
+
+def open_source(spec):
+    """
+    Build a source from a short spec:
+    camera[:index], video:<path>, images:<dir>, synthetic[:frames]; a bare path is
+    treated as a directory of images or a video file.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "camera":
+        return CameraSource(int(arg or 0))
+    if kind == "video":
+        return VideoFileSource(arg)
+    if kind == "images":
+        return ImageDirectorySource(arg)
+    if kind == "synthetic":
+        return SyntheticSource(frames=int(arg) if arg else 300)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec)
+    if os.path.exists(spec):
+        return VideoFileSource(spec)
+    raise ValueError(f"Unknown frame source {spec!r}")
+
+
+class FramePacer:
+    """ Sleeps so that a replayed source is delivered at its recorded frame rate """
+
+    def __init__(self, fps):
+        self.period = 1.0 / fps
+        self.next_due = None
+
+    def wait(self):
+        now = time.perf_counter()
+        if self.next_due is None:
+            self.next_due = now
+        elif self.next_due > now:
+            time.sleep(self.next_due - now)
+        self.next_due = max(self.next_due + self.period, now - self.period)
@@ -0,0 +1,113 @@
+# Cheap box tracker used to fill in the frames between two detector passes.
+# Boxes are (x, y, w, h, confidence) tuples in frame pixels, the same shape
+# detect_people() returns.
+import math
+
+
+def centre_distance(box_a, box_b):
+    ax, ay, aw, ah = box_a[:4]
+    bx, by, bw, bh = box_b[:4]
+    return math.hypot((ax + aw / 2) - (bx + bw / 2), (ay + ah / 2) - (by + bh / 2))
+
+
+class Track:
+    def __init__(self, box):
+        self.box = tuple(box)
+        self.detected_box = tuple(box)
+        self.velocity = (0.0, 0.0)
+        self.frames_since_detection = 0
+        self.missed_detections = 0
+
+    def predict(self):
+        # Constant velocity between detector passes
+        x, y, w, h, conf = self.box
+        vx, vy = self.velocity
+        self.box = (x + vx, y + vy, w, h, conf)
+        self.frames_since_detection += 1
+
+    def gate(self, base_gate, gate_growth):
+        # A new track has no velocity yet, so the further its last detection
+        # lies in the past the further from the prediction its person may be
+        size = max(self.box[2], self.box[3])
+        return size * (base_gate + gate_growth * self.frames_since_detection)
+
+    def correct(self, box):
+        frames = max(self.frames_since_detection, 1)
+        old_x, old_y = self.detected_box[:2]
+        self.velocity = ((box[0] - old_x) / frames, (box[1] - old_y) / frames)
+        self.box = tuple(box)
+        self.detected_box = tuple(box)
+        self.frames_since_detection = 0
+        self.missed_detections = 0
+
+
+class BoxTracker:
+    def __init__(self, base_gate=0.5, gate_growth=0.1, max_missed=1, max_predict_frames=60):
+        # A detection belongs to a track when its centre lies within
+        # track size * (base_gate + gate_growth * frames since the track's last detection)
+        self.base_gate = base_gate
+        self.gate_growth = gate_growth
+        self.max_missed = max_missed
+        self.max_predict_frames = max_predict_frames
+        self.tracks = []
+
+    def update(self, detections):
+        """ Match a fresh set of detector boxes to the live tracks (greedy, nearest centre first) """
+        pairs = []
+        for t_index, track in enumerate(self.tracks):
+            gate = track.gate(self.base_gate, self.gate_growth)
+            for d_index, box in enumerate(detections):
+                distance = centre_distance(track.box, box)
+                if distance <= gate:
+                    pairs.append((distance, t_index, d_index))
+        pairs.sort()
+
+        matched_tracks = set()
+        matched_detections = set()
+        for _, t_index, d_index in pairs:
+            if t_index in matched_tracks or d_index in matched_detections:
+                continue
+            self.tracks[t_index].correct(detections[d_index])
+            matched_tracks.add(t_index)
+            matched_detections.add(d_index)
+
+        survivors = []
+        for t_index, track in enumerate(self.tracks):
+            if t_index not in matched_tracks:
+                track.missed_detections += 1
+                if track.missed_detections > self.max_missed:
+                    continue
+            survivors.append(track)
+
+        for d_index, box in enumerate(detections):
+            if d_index not in matched_detections:
+                survivors.append(Track(box))
+
+        self.tracks = survivors
+        return self.boxes
+
+    def predict(self):
+        """ Advance every track one frame without running the detector """
+        for track in self.tracks:
+            track.predict()
+        self.tracks = [
+            t for t in self.tracks
+            if t.frames_since_detection <= self.max_predict_frames
+        ]
+        return self.boxes
+
+    def reset(self):
+        self.tracks = []
+
+    @property
+    def confirmed(self):
+        # Tracks the latest detector pass saw; the others only wait to be re-matched
+        return [t for t in self.tracks if t.missed_detections == 0]
+
+    @property
+    def boxes(self):
+        return [t.box for t in self.confirmed]
+
+    @property
+    def count(self):
+        return len(self.confirmed)
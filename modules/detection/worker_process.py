@@ -0,0 +1,268 @@
+# Runs the detector in a separate process so YOLO and its NumPy post-processing
+# never compete with the Qt event loop for the GIL. Frames travel through
+# multiprocessing.shared_memory slots (the camera writes straight into them);
+# only slot numbers and the resulting boxes go over the pipe.
+import multiprocessing
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+SLOTS = 4  # one being captured, one queued, one in the worker, one spare
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots=SLOTS, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.frame_bytes = int(np.prod(self.shape))
+        self.owner = name is None
+        # Spawned workers share the parent's resource tracker, so attaching
+        # here does not make the segment disappear when a worker dies
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=self.frame_bytes * slots)
+
+        buffer = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.views = [buffer[i] for i in range(slots)]
+        self.addresses = [view.__array_interface__["data"][0] for view in self.views]
+        self.free = set(range(slots))
+        self.lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def acquire(self):
+        with self.lock:
+            return self.free.pop() if self.free else None
+
+    def release(self, slot):
+        with self.lock:
+            self.free.add(slot)
+
+    def slot_of(self, frame):
+        """ Index of the slot this array lives in, or None for an ordinary array """
+        if frame.shape != self.shape:
+            return None
+        address = frame.__array_interface__["data"][0]
+        return self.addresses.index(address) if address in self.addresses else None
+
+    def close(self):
+        self.views = []
+        self.addresses = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(config, ring_name, shape, slots, conn):
+    from modules.detection.registry import get_detector
+    from modules.detection.roi import Roi
+
+    ring = SharedFrameRing(shape, slots, name=ring_name)
+    try:
+        try:
+            detector = get_detector(config)
+        except Exception as e:
+            conn.send(("error", str(e)))
+            return
+        conn.send(("ready", detector.describe()))
+
+        while True:
+            message = conn.recv()
+            if message[0] == "stop":
+                break
+            _, seq, slot, roi = message
+            started = time.perf_counter()
+            boxes = detector.detect(ring.views[slot], roi=Roi(*roi) if roi else None)
+            conn.send(("result", seq, boxes, time.perf_counter() - started))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        ring.close()
+
+
+class DetectionProcess:
+    """ Detector interface (detect/describe) backed by a restartable worker process """
+
+    def __init__(self, config, detect_timeout=10.0, load_timeout=180.0, min_backoff=1.0, max_backoff=60.0):
+        self.config = config
+        self.detect_timeout = detect_timeout
+        self.load_timeout = load_timeout
+        self.context = multiprocessing.get_context("spawn")  # never fork a Qt process
+        self.ring = None
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.load_deadline = None
+        self.seq = 0
+        self.restarts = 0
+        # A failed worker is replaced in the background; until then detect() returns no boxes
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.backoff = min_backoff
+        self.retry_at = 0.0
+        self.description = {"backend": config["backend"], "process": True}
+
+    # -- capture side -------------------------------------------------------
+
+    def capture(self, source):
+        """ Read the next frame straight into a shared-memory slot: (ok, frame, slot) """
+        if self.ring is None:
+            ok, frame = source.read()
+            if not ok:
+                return False, None, None
+            self.start(frame.shape)
+            slot = self.ring.acquire()
+            np.copyto(self.ring.views[slot], frame)
+            return True, self.ring.views[slot], slot
+
+        slot = self.ring.acquire()
+        if slot is None:
+            ok, frame = source.read()
+            return ok, frame, None
+        ok, frame = source.read_into(self.ring.views[slot])
+        if not ok or self.ring.slot_of(frame) != slot:
+            self.ring.release(slot)
+            return ok, frame, None
+        return True, frame, slot
+
+    def release_slot(self, slot):
+        if slot is not None and self.ring is not None:
+            self.ring.release(slot)
+
+    # -- detector interface -------------------------------------------------
+
+    def detect(self, frame, roi=None):
+        if self.ring is None or frame.shape != self.ring.shape:
+            self.start(frame.shape)
+
+        slot = self.ring.slot_of(frame)
+        borrowed = None
+        if slot is None:
+            borrowed = slot = self.ring.acquire()
+            if slot is None:
+                return []
+            np.copyto(self.ring.views[slot], frame)
+
+        try:
+            return self.request(slot, roi)
+        finally:
+            self.release_slot(borrowed)
+
+    def describe(self):
+        return dict(self.description, restarts=self.restarts)
+
+    # -- worker management --------------------------------------------------
+
+    def request(self, slot, roi):
+        if not self.worker_ready():
+            return []
+        self.seq += 1
+        roi_args = (roi.zone, roi.margin) if roi is not None else None
+        try:
+            self.conn.send(("detect", self.seq, slot, roi_args))
+            deadline = time.monotonic() + self.detect_timeout
+            while self.conn.poll(max(0.0, deadline - time.monotonic())):
+                message = self.conn.recv()
+                if message[0] == "result" and message[1] == self.seq:
+                    return message[2]
+            print("❌ Detection worker is not responding, restarting it.")
+        except (EOFError, OSError):
+            print("❌ Detection worker crashed, restarting it.")
+
+        self.restarts += 1
+        self.stop_worker(graceful=False)
+        self.retry_at = 0.0  # the first restart is immediate, the backoff applies if it fails
+        return []
+
+    def worker_ready(self):
+        """ True when a worker can take a frame; starts and polls a replacement without blocking """
+        try:
+            if self.conn is None:
+                if time.monotonic() < self.retry_at:
+                    return False
+                self.spawn_worker()
+            if self.ready:
+                return True
+            if self.conn.poll(0):
+                self.finish_loading()
+                return True
+            if time.monotonic() < self.load_deadline:
+                return False
+            raise RuntimeError("Detection worker did not load its model in time")
+        except (RuntimeError, EOFError, OSError) as e:
+            print(f"❌ Could not restart detection worker, retrying in {self.backoff:g}s: {e}")
+            self.stop_worker(graceful=False)
+            self.retry_at = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            return False
+
+    def start(self, shape):
+        """ (Re)create the frame slots for this frame size and start a worker on them """
+        self.stop_worker()
+        if self.ring is not None:
+            # Threads may still hold views of the old slots: only unlink the
+            # segment, the mapping goes away with the last view
+            self.ring.shm.unlink()
+        self.ring = SharedFrameRing(shape)
+        self.start_worker()
+
+    def start_worker(self):
+        """ Start a worker and wait until its model is loaded """
+        self.spawn_worker()
+        if not self.conn.poll(self.load_timeout):
+            self.stop_worker(graceful=False)
+            raise RuntimeError("Detection worker did not load its model in time")
+        self.finish_loading()
+
+    def spawn_worker(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=_worker_main,
+            args=(self.config, self.ring.name, self.ring.shape, self.ring.slots, child_conn),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        # The worker loads the model before it answers; that is the slow part
+        self.load_deadline = time.monotonic() + self.load_timeout
+
+    def finish_loading(self):
+        """ Read the worker's answer to loading; call once it is waiting on the pipe """
+        try:
+            status, detail = self.conn.recv()
+        except EOFError:
+            status, detail = "error", "worker exited while loading"
+        if status != "ready":
+            self.stop_worker(graceful=False)
+            raise RuntimeError(f"Detection worker failed to load its model: {detail}")
+        self.description = dict(detail, process=True)
+        self.ready = True
+        self.backoff = self.min_backoff
+
+    def stop_worker(self, graceful=True):
+        if self.process is not None:
+            if graceful and self.process.is_alive():
+                try:
+                    self.conn.send(("stop",))
+                except OSError:
+                    pass
+                self.process.join(2.0)
+            if self.process.is_alive():
+                self.process.kill()
+            self.process.join()
+            self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.ready = False
+
+    def close(self):
+        self.stop_worker()
+        if self.ring is not None:
+            try:
+                self.ring.close()
+            except BufferError:
+                self.ring.shm.unlink()
+            self.ring = None
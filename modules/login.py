@@ -1,8 +1,6 @@
 from PySide6 import QtWidgets, QtCore
-import sqlite3
-import os
 import bcrypt
-from modules.database.db import get_db_path
+from modules.database.db import fetch_user_by_email
 
 class LoginDialog(QtWidgets.QDialog):
     def __init__(self):
@@ -40,12 +38,7 @@ class LoginDialog(QtWidgets.QDialog):
             self.status_label.setText("❌ Enter both email and password.")
             return
 
-        conn = sqlite3.connect(get_db_path())
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT id, name, password_hash, role FROM users WHERE email = ?", (email,))
-        user = cursor.fetchone()
-        conn.close()
+        user = fetch_user_by_email(email)
 
         if user:
             user_id, name, password_hash, role = user
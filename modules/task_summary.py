@@ -0,0 +1,136 @@
+from PySide6 import QtCore, QtWidgets
+from modules.database.db import fetch_tasks_page, fetch_tasks_summary_page
+
+USER_ID_ROLE = QtCore.Qt.UserRole
+
+
+class PagedListModel(QtCore.QAbstractListModel):
+    """ List model that pulls rows one page at a time as the view scrolls down """
+    page_size = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.exhausted = False
+
+    def fetch_page(self):
+        raise NotImplementedError
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        page = self.fetch_page()
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if not page:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+
+
+class TaskSummaryModel(PagedListModel):
+    """ One row per user: (user id, name, task count) """
+    page_size = 200
+
+    def fetch_page(self):
+        after = self.rows[-1][0] if self.rows else 0
+        return fetch_tasks_summary_page(after, self.page_size)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        user_id, name, task_count = self.rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return f"{name} — {task_count} tasks"
+        if role == USER_ID_ROLE:
+            return user_id
+        return None
+
+
+class UserTasksModel(PagedListModel):
+    """ One user's tasks, newest first: (id, title, description, timestamp) """
+    page_size = 50
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.user_id = None
+        self.exhausted = True
+
+    def set_user(self, user_id):
+        self.beginResetModel()
+        self.user_id = user_id
+        self.rows = []
+        self.exhausted = user_id is None
+        self.endResetModel()
+
+    def fetch_page(self):
+        before = (self.rows[-1][3], self.rows[-1][0]) if self.rows else None
+        return fetch_tasks_page(self.user_id, before, self.page_size)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _, title, description, timestamp = self.rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return f"Title: {title}\nDescription: {description}\nTime: {timestamp}"
+        return None
+
+
+class TaskSummaryViewer(QtWidgets.QDialog):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Task Summary")
+        self.setMinimumSize(700, 400)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        splitter = QtWidgets.QSplitter()
+        layout.addWidget(splitter)
+
+        # Both lists load lazily: only the first page is queried when the dialog opens
+        self.summary_model = TaskSummaryModel(self)
+        self.user_view = QtWidgets.QListView()
+        self.user_view.setUniformItemSizes(True)
+        self.user_view.setModel(self.summary_model)
+        splitter.addWidget(self.user_view)
+
+        self.tasks_model = UserTasksModel(self)
+        self.task_view = QtWidgets.QListView()
+        self.task_view.setWordWrap(True)
+        self.task_view.setModel(self.tasks_model)
+        splitter.addWidget(self.task_view)
+        splitter.setSizes([250, 450])
+
+        self.status_label = QtWidgets.QLabel("Select an employee to see their tasks.")
+        layout.addWidget(self.status_label)
+
+        self.user_view.selectionModel().currentChanged.connect(self.show_user_tasks)
+
+    def show_user_tasks(self, current, previous=None):
+        if not current.isValid():
+            self.tasks_model.set_user(None)
+            return
+
+        # The id travels with the item, so users sharing a name are told apart
+        user_id = current.data(USER_ID_ROLE)
+        self.tasks_model.set_user(user_id)
+        if self.tasks_model.canFetchMore():
+            self.tasks_model.fetchMore()
+
+        name = self.summary_model.rows[current.row()][1]
+        if not self.tasks_model.rows:
+            self.status_label.setText(f"No tasks found for {name}.")
+        else:
+            self.status_label.setText(f"Tasks of {name}")
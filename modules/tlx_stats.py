@@ -1,6 +1,15 @@
 from PySide6 import QtWidgets
-import sqlite3
-from modules.database.db import get_db_path
+from datetime import date, timedelta
+from modules.database.connection import read_snapshot
+from modules.database.db import fetch_tlx_totals, fetch_tlx_window
+
+DIMENSIONS = ["Mental", "Physical", "Temporal", "Performance", "Effort", "Frustration"]
+
+
+def mean_and_variance(n, total, total_sq):
+    """ Population mean and variance from a running count, sum and sum of squares """
+    mean = total / n
+    return mean, max(total_sq / n - mean * mean, 0.0)
 
 class TLXStatsWidget(QtWidgets.QWidget):
     def __init__(self, user_id, user_role):
@@ -11,72 +20,73 @@ class TLXStatsWidget(QtWidgets.QWidget):
 
         self.layout = QtWidgets.QHBoxLayout(self)
 
-        # Two separate group boxes
+        # Separate group boxes
         self.avg_group = QtWidgets.QGroupBox("Average Scores")
+        self.recent_group = QtWidgets.QGroupBox("Last 7 / 30 Days")
         self.latest_group = QtWidgets.QGroupBox("Latest Scores")
 
         self.avg_layout = QtWidgets.QVBoxLayout()
+        self.recent_layout = QtWidgets.QVBoxLayout()
         self.latest_layout = QtWidgets.QVBoxLayout()
 
         self.avg_labels = {}
+        self.recent_labels = {}
         self.latest_labels = {}
 
-        for dimension in ["Mental", "Physical", "Temporal", "Performance", "Effort", "Frustration"]:
+        for dimension in DIMENSIONS:
             avg_label = QtWidgets.QLabel(f"{dimension}: --")
+            recent_label = QtWidgets.QLabel(f"{dimension}: --")
             latest_label = QtWidgets.QLabel(f"{dimension}: --")
 
             self.avg_layout.addWidget(avg_label)
+            self.recent_layout.addWidget(recent_label)
             self.latest_layout.addWidget(latest_label)
 
             self.avg_labels[dimension] = avg_label
+            self.recent_labels[dimension] = recent_label
             self.latest_labels[dimension] = latest_label
 
         self.avg_group.setLayout(self.avg_layout)
+        self.recent_group.setLayout(self.recent_layout)
         self.latest_group.setLayout(self.latest_layout)
 
         self.layout.addWidget(self.avg_group)
+        self.layout.addWidget(self.recent_group)
         self.layout.addWidget(self.latest_group)
 
         self.refresh_stats()
 
     def refresh_stats(self):
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT mental, physical, temporal, performance, effort, frustration
-            FROM tlx_entries
-            WHERE user_id = ?
-            ORDER BY timestamp ASC
-        ''', (self.user_id,))
-        rows = cursor.fetchall()
-        conn.close()
-
-        if not rows:
-            for dimension in self.avg_labels.keys():
+        # Running aggregates kept by triggers on tlx_entries (see migrations.py):
+        # a handful of rows per dimension however many entries there are
+        with read_snapshot():
+            totals = {row[0]: row[1:] for row in fetch_tlx_totals(self.user_id)}
+            week = self.window_averages(7)
+            month = self.window_averages(30)
+
+        for dimension in DIMENSIONS:
+            key = dimension.lower()
+            if key not in totals:
                 self.avg_labels[dimension].setText(f"{dimension}: No data")
+                self.recent_labels[dimension].setText(f"{dimension}: No data")
                 self.latest_labels[dimension].setText(f"{dimension}: No data")
-            return
-
-        mentals = [row[0] for row in rows]
-        physicals = [row[1] for row in rows]
-        temporals = [row[2] for row in rows]
-        performances = [row[3] for row in rows]
-        efforts = [row[4] for row in rows]
-        frustrations = [row[5] for row in rows]
-
-        metrics = {
-            "Mental": mentals,
-            "Physical": physicals,
-            "Temporal": temporals,
-            "Performance": performances,
-            "Effort": efforts,
-            "Frustration": frustrations
+                continue
+
+            n, total, total_sq, latest = totals[key]
+            avg, variance = mean_and_variance(n, total, total_sq)
+            self.avg_labels[dimension].setText(f"{dimension}: {avg:.2f} (σ² {variance:.1f})")
+            self.recent_labels[dimension].setText(
+                f"{dimension}: {self.format_average(week.get(key))} / {self.format_average(month.get(key))}"
+            )
+            self.latest_labels[dimension].setText(f"{dimension}: {latest:.2f}")
+
+    def window_averages(self, days):
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        return {
+            dimension: mean_and_variance(n, total, total_sq)[0]
+            for dimension, n, total, total_sq in fetch_tlx_window(self.user_id, since)
+            if n
         }
 
-        for dimension, values in metrics.items():
-            avg = sum(values) / len(values)
-            latest = values[-1]
-            self.avg_labels[dimension].setText(f"{dimension}: {avg:.2f}")
-            self.latest_labels[dimension].setText(f"{dimension}: {latest:.2f}")
\ No newline at end of file
+    def format_average(self, value):
+        return "--" if value is None else f"{value:.2f}"
@@ -0,0 +1,316 @@
+"""
+Where the title of the foreground window comes from.
+
+A source can always be asked for the current window: its title and the
+process it belongs to (the app's identity, e.g. "Code.exe" or "firefox").
+Sources with event_driven = True also report every change themselves once
+started, with the time it happened, so the tracker needs no polling timer:
+
+    Win32WindowSource   SetWinEventHook on foreground and title changes;
+                        the process is the owning exe's file name
+    X11WindowSource     PropertyNotify on the root window's _NET_ACTIVE_WINDOW
+                        and on the active window's title (needs python-xlib);
+                        the process is WM_CLASS, or _NET_WM_PID's command name
+    FakeWindowSource    plays back a scripted list of titles, for tests
+
+create_window_source() picks one for the platform; TLX_WINDOW_SOURCE
+("win32", "x11", "fake") overrides it.
+"""
+import os
+import select
+import sys
+import threading
+import time
+
+UNKNOWN = "Unknown"
+
+
+class WindowSource:
+    event_driven = False
+
+    def current_window(self):
+        """ (title, process) of the foreground window """
+        return UNKNOWN, UNKNOWN
+
+    def current_title(self):
+        return self.current_window()[0]
+
+    def start(self, callback):
+        """ Report changes as callback(title, process, timestamp) from a background thread """
+        raise NotImplementedError(f"{type(self).__name__} has no event mode")
+
+    def stop(self):
+        pass
+
+
+class Win32WindowSource(WindowSource):
+    event_driven = True
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        import win32gui
+        self.win32gui = win32gui
+        self.thread = None
+        self.thread_id = None
+        self.last_window = None
+
+    def process_name(self, hwnd):
+        import ctypes
+        from ctypes import wintypes
+
+        pid = wintypes.DWORD()
+        ctypes.windll.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        kernel32 = ctypes.windll.kernel32
+        # Limited rights are enough for the image name, even of elevated processes
+        handle = kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+        if not handle:
+            return UNKNOWN
+        try:
+            size = wintypes.DWORD(1024)
+            path = ctypes.create_unicode_buffer(size.value)
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, path, ctypes.byref(size)):
+                return UNKNOWN
+            return os.path.basename(path.value) or UNKNOWN
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def current_window(self):
+        try:
+            hwnd = self.win32gui.GetForegroundWindow()
+            return self.win32gui.GetWindowText(hwnd), self.process_name(hwnd)
+        except Exception:
+            return UNKNOWN, UNKNOWN
+
+    def start(self, callback):
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(callback, ready), name="window-events", daemon=True)
+        self.thread.start()
+        ready.wait(5.0)
+
+    def run(self, callback, ready):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        self.thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, event_time):
+            # Title changes of other windows and of child objects are noise
+            if event == self.EVENT_OBJECT_NAMECHANGE and (
+                    id_object != self.OBJID_WINDOW or hwnd != user32.GetForegroundWindow()):
+                return
+            window = self.current_window()
+            if window != self.last_window:
+                self.last_window = window
+                callback(*window, time.time())
+
+        # Keep a reference: the hook calls back into this for as long as it is installed
+        self.proc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )(on_event)
+        hooks = [
+            user32.SetWinEventHook(event, event, 0, self.proc, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+            for event in (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_OBJECT_NAMECHANGE)
+        ]
+        ready.set()
+
+        # Out-of-context hooks are delivered through this thread's message queue;
+        # GetMessage sleeps until there is one, so an idle desktop costs nothing
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+
+    def stop(self):
+        if self.thread is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self.thread_id, self.WM_QUIT, 0, 0)
+            self.thread.join(2.0)
+            self.thread = None
+
+
+class X11WindowSource(WindowSource):
+    event_driven = True
+
+    def __init__(self, display_name=None):
+        from Xlib import X, display
+        self.X = X
+        # Separate connections: Xlib displays are not thread-safe
+        self.display = display.Display(display_name)
+        self.event_display = None
+        self.display_name = display_name
+        self.atoms = {
+            name: self.display.intern_atom(name)
+            for name in ("_NET_ACTIVE_WINDOW", "_NET_WM_NAME", "WM_NAME", "UTF8_STRING", "_NET_WM_PID")
+        }
+        self.thread = None
+        self.running = False
+        self.last_window = None
+
+    def active_window(self, display):
+        prop = display.screen().root.get_full_property(self.atoms["_NET_ACTIVE_WINDOW"], self.X.AnyPropertyType)
+        if not prop or not prop.value or not prop.value[0]:
+            return None
+        return display.create_resource_object("window", prop.value[0])
+
+    def window_title(self, window):
+        for name, kind in (("_NET_WM_NAME", self.atoms["UTF8_STRING"]), ("WM_NAME", self.X.AnyPropertyType)):
+            prop = window.get_full_property(self.atoms[name], kind)
+            if prop and prop.value:
+                value = prop.value
+                return value.decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+        return ""
+
+    def window_process(self, window):
+        wm_class = window.get_wm_class()
+        if wm_class and wm_class[1]:
+            return wm_class[1]
+        # No WM_CLASS: the command name of the owning process, if it runs on this machine
+        prop = window.get_full_property(self.atoms["_NET_WM_PID"], self.X.AnyPropertyType)
+        if prop and prop.value:
+            try:
+                with open(f"/proc/{prop.value[0]}/comm") as f:
+                    return f.read().strip() or UNKNOWN
+            except OSError:
+                pass
+        return UNKNOWN
+
+    def describe(self, window):
+        if window is None:
+            return UNKNOWN, UNKNOWN
+        return self.window_title(window), self.window_process(window)
+
+    def current_window(self):
+        try:
+            return self.describe(self.active_window(self.display))
+        except Exception:
+            return UNKNOWN, UNKNOWN
+
+    def start(self, callback):
+        from Xlib import display
+        self.event_display = display.Display(self.display_name)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, args=(callback,), name="window-events", daemon=True)
+        self.thread.start()
+
+    def run(self, callback):
+        X = self.X
+        d = self.event_display
+        d.screen().root.change_attributes(event_mask=X.PropertyChangeMask)
+        watched = None
+
+        def report():
+            nonlocal watched
+            window = self.active_window(d)
+            if window is not None and (watched is None or window.id != watched.id):
+                # Follow the active window's own title too (browser tabs, editor files)
+                window.change_attributes(event_mask=X.PropertyChangeMask)
+                watched = window
+            current = self.describe(window)
+            if current != self.last_window:
+                self.last_window = current
+                callback(*current, time.time())
+
+        try:
+            report()
+            while self.running:
+                # Sleep in select() until the X server has something for us
+                if not d.pending_events():
+                    select.select([d.fileno()], [], [], 0.5)
+                    if not d.pending_events():
+                        continue
+                event = d.next_event()
+                if event.type != X.PropertyNotify:
+                    continue
+                if event.atom == self.atoms["_NET_ACTIVE_WINDOW"] or (
+                        watched is not None and event.window.id == watched.id
+                        and event.atom in (self.atoms["_NET_WM_NAME"], self.atoms["WM_NAME"])):
+                    try:
+                        report()
+                    except Exception:
+                        watched = None  # the window went away under us; the next event recovers
+        finally:
+            d.close()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(2.0)
+            self.thread = None
+
+
+class FakeWindowSource(WindowSource):
+    """
+    Plays back [(seconds to wait, title) or (seconds, title, process), ...];
+    switch() injects a change by hand. Without a process the title doubles as one.
+    """
+    event_driven = True
+
+    def __init__(self, script=(), initial_title=UNKNOWN, initial_process=None):
+        self.script = list(script)
+        self.title = initial_title
+        self.process = initial_process or initial_title
+        self.callback = None
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def current_window(self):
+        return self.title, self.process
+
+    def switch(self, title, timestamp=None, process=None):
+        self.title = title
+        self.process = process or title
+        if self.callback is not None:
+            self.callback(title, self.process, timestamp or time.time())
+
+    def start(self, callback):
+        self.callback = callback
+        self.stop_event.clear()
+        callback(self.title, self.process, time.time())
+        if self.script:
+            self.thread = threading.Thread(target=self.run, name="window-events", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        for delay, title, *process in self.script:
+            if self.stop_event.wait(delay):
+                return
+            self.switch(title, process=process[0] if process else None)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(2.0)
+            self.thread = None
+        self.callback = None
+
+
+def create_window_source(name=None):
+    """ The best source for this platform, or a plain WindowSource (always "Unknown") if none works """
+    name = name or os.environ.get("TLX_WINDOW_SOURCE") or (
+        "win32" if sys.platform == "win32" else "x11" if os.environ.get("DISPLAY") else None
+    )
+    try:
+        if name == "win32":
+            return Win32WindowSource()
+        if name == "x11":
+            return X11WindowSource()
+        if name == "fake":
+            return FakeWindowSource()
+    except Exception as e:
+        print(f"❌ Window source {name!r} unavailable ({e}); app usage will be recorded as {UNKNOWN!r}")
+        return WindowSource()
+    if name is not None:
+        print(f"❌ Unknown window source {name!r}")
+    else:
+        print(f"❌ No window source for this platform; app usage will be recorded as {UNKNOWN!r}")
+    return WindowSource()
@@ -0,0 +1,38 @@
+from modules.detection.tracker import BoxTracker
+
+
+def run(tracker, boxes_at, frames, detect_every):
+    counts = []
+    for frame in range(frames):
+        if frame % detect_every == 0:
+            tracker.update(boxes_at(frame))
+        else:
+            tracker.predict()
+        counts.append(tracker.count)
+    return counts
+
+
+def test_lone_moving_person_is_one_track():
+    person = lambda frame: [(100 + 12 * frame, 80, 120, 300, 0.9)]
+    counts = run(BoxTracker(), person, frames=60, detect_every=5)
+    assert counts == [1] * 60
+
+
+def test_lone_fast_person_with_long_gaps():
+    person = lambda frame: [(15 * frame, 80, 120, 300, 0.9)]
+    counts = run(BoxTracker(), person, frames=100, detect_every=10)
+    assert counts == [1] * 100
+
+
+def test_two_people_are_two_tracks():
+    people = lambda frame: [(100 + 5 * frame, 80, 120, 300, 0.9), (700 - 5 * frame, 80, 120, 300, 0.8)]
+    counts = run(BoxTracker(), people, frames=40, detect_every=5)
+    assert counts == [2] * 40
+
+
+def test_unmatched_track_is_not_counted():
+    tracker = BoxTracker()
+    tracker.update([(100, 80, 120, 300, 0.9)])
+    tracker.update([])
+    assert tracker.count == 0
+    assert len(tracker.tracks) == 1